@@ -1,10 +1,12 @@
 from abc import ABC
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Callable, Optional
 
-from lox.runtime import truthy
+from operator import eq, ge, gt, is_, le, lt, ne
 
-from .ctx import Ctx
+from lox.runtime import lox_add, lox_mul, lox_sub, lox_truediv, truthy
+
+from .ctx import MISSING, Ctx
 
 # Declaramos nossa classe base num módulo separado para esconder um pouco de
 # Python relativamente avançado de quem não se interessar pelo assunto.
@@ -22,8 +24,72 @@ from .node import Node
 # Tipos de valores que podem aparecer durante a execução do programa
 Value = bool | str | float | None
 
+# Número de substituições feitas com `replace_child` em qualquer árvore. Serve
+# apenas como teste rápido em `Snapshot.matches`.
+_edit_count = 0
+
+
+class LoxNode(Node, ABC):
+    """
+    Classe base para os nós da árvore sintática do Lox.
 
-class Expr(Node, ABC):
+    Alguns nós guardam em atributos privados (iniciados com "_") dados
+    derivados dos filhos, como o bytecode de um programa. Esses dados são
+    descartados quando um filho é substituído com `replace_child`.
+    """
+
+    __slots__ = ()
+
+    def replace_child(self, old: Node, new: Node) -> None:
+        global _edit_count
+        super().replace_child(old, new)
+        _edit_count += 1
+        self.clear_cache()
+
+    def clear_cache(self) -> None:
+        """
+        Descarta valores calculados a partir dos filhos do nó.
+        """
+        for attr in getattr(type(self), "__dataclass_fields__", ()):
+            if attr.startswith("_") and hasattr(self, attr):
+                delattr(self, attr)
+
+
+@dataclass(slots=True)
+class Snapshot:
+    """
+    Nós de uma subárvore no momento em que algum dado foi derivado dela.
+
+    Os nós não conhecem seus pais, então `clear_cache` não chega aos
+    ancestrais do nó modificado. Nós que guardam dados derivados de toda a
+    subárvore (programas e funções) guardam um `Snapshot` e verificam se
+    algum descendente foi substituído antes de reutilizar os dados.
+    """
+
+    nodes: tuple[Node, ...]
+    edits: int
+
+    @classmethod
+    def of(cls, node: Node) -> "Snapshot":
+        return cls(tuple(node.descendants()), _edit_count)
+
+    def matches(self, node: Node) -> bool:
+        """
+        Verifica se a subárvore de `node` ainda é formada pelos mesmos nós.
+
+        A subárvore só é percorrida se alguma árvore foi modificada desde a
+        última verificação.
+        """
+        if self.edits == _edit_count:
+            return True
+        nodes = tuple(node.descendants())
+        if len(nodes) != len(self.nodes) or not all(map(is_, nodes, self.nodes)):
+            return False
+        self.edits = _edit_count
+        return True
+
+
+class Expr(LoxNode, ABC):
     """
     Classe base para expressões.
 
@@ -32,8 +98,10 @@ class Expr(Node, ABC):
     funções, etc.
     """
 
+    __slots__ = ()
 
-class Stmt(Node, ABC):
+
+class Stmt(LoxNode, ABC):
     """
     Classe base para comandos.
 
@@ -41,9 +109,11 @@ class Stmt(Node, ABC):
     execução do código ou declaram elementos como classes, funções, etc.
     """
 
+    __slots__ = ()
+
 
-@dataclass
-class Program(Node):
+@dataclass(slots=True)
+class Program(LoxNode):
     """
     Representa um programa.
 
@@ -51,16 +121,31 @@ class Program(Node):
     """
 
     stmts: list[Stmt]
+    _bytecode: tuple = field(init=False, repr=False, compare=False)
+    _handlers: tuple = field(init=False, repr=False, compare=False)
+    _snapshot: Snapshot = field(init=False, repr=False, compare=False)
 
     def eval(self, ctx: Ctx):
-        for stmt in self.stmts:
-            stmt.eval(ctx)
+        # Programas são compilados para bytecode na primeira execução e
+        # executados pela máquina virtual definida em lox/vm.py. O bytecode é
+        # refeito se algum nó da árvore for substituído.
+        from .vm import compile_program, execute, thread
+
+        try:
+            stale = not self._snapshot.matches(self)
+        except AttributeError:
+            stale = True
+        if stale:
+            bytecode = self._bytecode = compile_program(self)
+            self._handlers = thread(*bytecode)
+            self._snapshot = Snapshot.of(self)
+        execute(self._handlers, ctx)
 
 
 #
 # EXPRESSÕES
 #
-@dataclass
+@dataclass(slots=True)
 class BinOp(Expr):
     """
     Uma operação infixa com dois operandos.
@@ -78,7 +163,78 @@ class BinOp(Expr):
         return self.op(left_value, right_value)
 
 
-@dataclass
+def binop_class(name: str, fn: Callable[[Value, Value], Value]) -> type[BinOp]:
+    """
+    Cria uma subclasse de `BinOp` especializada para o operador `fn`.
+
+    O operador continua disponível no campo `op`, mas `eval` chama a função
+    diretamente, sem buscá-la no nó a cada avaliação.
+    """
+
+    @dataclass(slots=True)
+    class BinOpSpecialized(BinOp):
+        op: Callable[[Value, Value], Value] = fn
+
+        def eval(self, ctx: Ctx):
+            return fn(self.left.eval(ctx), self.right.eval(ctx))
+
+    BinOpSpecialized.__name__ = BinOpSpecialized.__qualname__ = name
+    return BinOpSpecialized
+
+
+# Uma subclasse de BinOp por operador, usada pelo LoxTransformer
+BINOP_CLASSES: dict[Callable, type[BinOp]] = {
+    op: binop_class(name, op)
+    for name, op in [
+        ("BinOpAdd", lox_add),
+        ("BinOpSub", lox_sub),
+        ("BinOpMul", lox_mul),
+        ("BinOpDiv", lox_truediv),
+        ("BinOpLt", lt),
+        ("BinOpLe", le),
+        ("BinOpGt", gt),
+        ("BinOpGe", ge),
+        ("BinOpEq", eq),
+        ("BinOpNe", ne),
+    ]
+}
+
+
+@dataclass(slots=True)
+class BinOpSlots(BinOp):
+    """
+    Operação entre duas variáveis locais já resolvidas.
+
+    Criada pelo `Resolver` a partir de `BinOp(VarSlot, VarSlot, op)`; lê os
+    dois slots diretamente, sem avaliar os nós filhos.
+    """
+
+    left_slot: int = field(kw_only=True)
+    right_slot: int = field(kw_only=True)
+
+    def eval(self, ctx: Ctx):
+        slots = ctx.slots
+        return self.op(slots[self.left_slot], slots[self.right_slot])
+
+
+@dataclass(slots=True)
+class BinOpSlotConst(BinOp):
+    """
+    Operação entre uma variável local e uma constante numérica.
+
+    Ex.: i < 10
+
+    Criada pelo `Resolver` a partir de `BinOp(VarSlot, Literal, op)`.
+    """
+
+    left_slot: int = field(kw_only=True)
+    constant: "Value" = field(kw_only=True)
+
+    def eval(self, ctx: Ctx):
+        return self.op(ctx.slots[self.left_slot], self.constant)
+
+
+@dataclass(slots=True)
 class Var(Expr):
     """
     Uma variável no código
@@ -89,13 +245,27 @@ class Var(Expr):
     name: str
 
     def eval(self, ctx: Ctx):
-        try:
-            return ctx[self.name]
-        except KeyError:
+        value = ctx.get(self.name, MISSING)
+        if value is MISSING:
             raise NameError(f"variável {self.name} não existe!")
+        return value
+
+
+@dataclass(slots=True)
+class VarSlot(Var):
+    """
+    Uma variável local já resolvida para uma posição fixa do contexto.
+
+    Criada pelo `Resolver` a partir de um nó `Var`.
+    """
+
+    slot: int = field(kw_only=True)
+
+    def eval(self, ctx: Ctx):
+        return ctx.slots[self.slot]
 
 
-@dataclass
+@dataclass(slots=True)
 class Literal(Expr):
     """
     Representa valores literais no código, ex.: strings, booleanos,
@@ -110,7 +280,7 @@ class Literal(Expr):
         return self.value
 
 
-@dataclass
+@dataclass(slots=True)
 class And(Expr):
     """
     Uma operação infixa com dois operandos.
@@ -126,7 +296,7 @@ class And(Expr):
             return left_value
         return self.right.eval(ctx)
 
-@dataclass
+@dataclass(slots=True)
 class Or(Expr):
     """
     Uma operação infixa com dois operandos.
@@ -141,7 +311,7 @@ class Or(Expr):
             return left_value
         return self.right.eval(ctx)
 
-@dataclass
+@dataclass(slots=True)
 class UnaryOp(Expr):
     """
     Uma operação prefixa com um operando.
@@ -154,7 +324,31 @@ class UnaryOp(Expr):
     def eval(self, ctx):
         return self.op(self.expr.eval(ctx))
 
-@dataclass
+@dataclass(slots=True)
+class Not(Expr):
+    """
+    Negação lógica.
+
+    Ex.: !x
+    """
+    expr: Expr
+
+    def eval(self, ctx: Ctx):
+        return not truthy(self.expr.eval(ctx))
+
+@dataclass(slots=True)
+class Neg(Expr):
+    """
+    Troca de sinal.
+
+    Ex.: -x
+    """
+    expr: Expr
+
+    def eval(self, ctx: Ctx):
+        return -self.expr.eval(ctx)
+
+@dataclass(slots=True)
 class Call(Expr):
     """
     Uma chamada de função
@@ -163,16 +357,31 @@ class Call(Expr):
     """
     callee: Expr
     params: list[Expr]
+    _param_evals: tuple = field(init=False, repr=False, compare=False)
     
     def eval(self, ctx: Ctx):
         func = self.callee.eval(ctx)
-        params = [param.eval(ctx) for param in self.params]
+        try:
+            param_evals = self._param_evals
+        except AttributeError:
+            param_evals = self._param_evals = tuple(param.eval for param in self.params)
+        # Chamadas com poucos argumentos são as mais comuns e não precisam
+        # criar uma lista intermediária
+        match len(param_evals):
+            case 0:
+                params = ()
+            case 1:
+                params = (param_evals[0](ctx),)
+            case 2:
+                params = (param_evals[0](ctx), param_evals[1](ctx))
+            case _:
+                params = tuple([fn(ctx) for fn in param_evals])
         if callable(func):
             return func(*params)
         raise TypeError(f"{self.callee} não é uma função!")
 
 
-@dataclass
+@dataclass(slots=True)
 class This(Expr):
     """
     Acesso ao `this`.
@@ -181,7 +390,7 @@ class This(Expr):
     """
 
 
-@dataclass
+@dataclass(slots=True)
 class Super(Expr):
     """
     Acesso a method ou atributo da superclasse.
@@ -190,7 +399,7 @@ class Super(Expr):
     """
 
 
-@dataclass
+@dataclass(slots=True)
 class Assign(Expr):
     """
     Atribuição de variável.
@@ -210,7 +419,79 @@ class Assign(Expr):
         ctx[self.name] = val
         return val
 
-@dataclass
+
+@dataclass(slots=True)
+class AssignSlot(Assign):
+    """
+    Atribuição a uma variável local já resolvida.
+
+    Criada pelo `Resolver` a partir de um nó `Assign`.
+    """
+
+    slot: int = field(kw_only=True)
+
+    def eval(self, ctx: Ctx):
+        val = ctx.slots[self.slot] = self.value.eval(ctx)
+        return val
+
+
+@dataclass(slots=True)
+class AssignSlotInt(AssignSlot):
+    """
+    Atribuição a uma variável local com nome de inteiro implícito (i, j, k...).
+
+    O `Resolver` decide em tempo de compilação se a conversão para inteiro é
+    necessária, evitando a verificação do nome a cada atribuição.
+    """
+
+    def eval(self, ctx: Ctx):
+        val = self.value.eval(ctx)
+        try:
+            val = int(val)
+        except Exception:
+            pass
+        ctx.slots[self.slot] = val
+        return val
+
+
+@dataclass(slots=True)
+class AddConstSlot(AssignSlot):
+    """
+    Incremento de uma variável local por uma constante.
+
+    Ex.: i = i + 1
+
+    Criada pelo `Resolver` a partir de
+    `AssignSlot(VarSlot, BinOp(VarSlot, Literal, lox_add))`. O campo `value`
+    guarda a expressão original, mas `eval` não a percorre.
+    """
+
+    increment: "Value" = field(kw_only=True)
+
+    def eval(self, ctx: Ctx):
+        slots = ctx.slots
+        val = slots[self.slot] = lox_add(slots[self.slot], self.increment)
+        return val
+
+
+@dataclass(slots=True)
+class AddConstSlotInt(AddConstSlot):
+    """
+    Incremento de uma variável local com nome de inteiro implícito.
+    """
+
+    def eval(self, ctx: Ctx):
+        slots = ctx.slots
+        val = lox_add(slots[self.slot], self.increment)
+        try:
+            val = int(val)
+        except Exception:
+            pass
+        slots[self.slot] = val
+        return val
+
+
+@dataclass(slots=True)
 class Getattr(Expr):
     """
     Acesso a atributo de um objeto.
@@ -228,7 +509,7 @@ class Getattr(Expr):
             obj_type = type(obj_value).__name__
             raise AttributeError(f"Objeto do tipo '{obj_type}' não possui o atributo '{self.attr}'")
 
-@dataclass
+@dataclass(slots=True)
 class Setattr(Expr):
     """
     Atribuição de atributo de um objeto.
@@ -253,7 +534,7 @@ class Setattr(Expr):
 #
 # COMANDOS
 #
-@dataclass
+@dataclass(slots=True)
 class Print(Stmt):
     """
     Representa uma instrução de impressão.
@@ -267,7 +548,7 @@ class Print(Stmt):
         print(lox_str(value))
 
 
-@dataclass
+@dataclass(slots=True)
 class Return(Stmt):
     """
     Representa uma instrução de retorno.
@@ -276,7 +557,7 @@ class Return(Stmt):
     """
 
 
-@dataclass
+@dataclass(slots=True)
 class VarDef(Stmt):
     """
     Representa uma declaração de variável.
@@ -297,7 +578,36 @@ class VarDef(Stmt):
         ctx.scope[self.name] = val
 
 
-@dataclass
+@dataclass(slots=True)
+class VarDefSlot(VarDef):
+    """
+    Declaração de uma variável local já resolvida.
+
+    Criada pelo `Resolver` a partir de um nó `VarDef`.
+    """
+
+    slot: int = field(kw_only=True)
+
+    def eval(self, ctx: Ctx):
+        ctx.slots[self.slot] = self.value.eval(ctx)
+
+
+@dataclass(slots=True)
+class VarDefSlotInt(VarDefSlot):
+    """
+    Declaração de uma variável local com nome de inteiro implícito.
+    """
+
+    def eval(self, ctx: Ctx):
+        val = self.value.eval(ctx)
+        try:
+            val = int(val)
+        except Exception:
+            pass
+        ctx.slots[self.slot] = val
+
+
+@dataclass(slots=True)
 class If(Stmt):
     """
     Representa uma instrução condicional.
@@ -316,7 +626,7 @@ class If(Stmt):
             self.else_stmt.eval(ctx)
 
 
-@dataclass
+@dataclass(slots=True)
 class While(Stmt):
     """
     Representa um laço de repetição.
@@ -331,21 +641,89 @@ class While(Stmt):
             self.body.eval(ctx)
 
 
-@dataclass
+@dataclass(slots=True)
+class WhileCmp(While):
+    """
+    Laço cuja condição compara uma variável local com uma constante.
+
+    Ex.: while (i < 10) { ... }
+
+    Criado pelo `Resolver` quando a condição é um `BinOpSlotConst` de
+    comparação. A comparação sempre produz um booleano, portanto o laço não
+    precisa chamar `truthy` nem avaliar o nó da condição.
+    """
+
+    slot: int = field(kw_only=True)
+    limit: "Value" = field(kw_only=True)
+    compare: Callable[[Value, Value], bool] = field(kw_only=True)
+
+    def eval(self, ctx: Ctx):
+        slots = ctx.slots
+        slot, limit, compare = self.slot, self.limit, self.compare
+        body = self.body.eval
+        while compare(slots[slot], limit):
+            body(ctx)
+
+
+@dataclass(slots=True)
 class Block(Stmt):
     """
     Representa bloco de comandos.
 
     Ex.: { var x = 42; print x;  }
+
+    Variáveis e funções declaradas no bloco ficam num escopo próprio, que
+    deixa de existir no fim do bloco.
     """
     declarations: list[Stmt]
+    _exec: Callable = field(init=False, repr=False, compare=False)
 
     def eval(self, ctx: Ctx):
-        for declaration in self.declarations:
-            declaration.eval(ctx)
-
-
-@dataclass
+        # Na primeira execução, o bloco é traduzido para uma função Python que
+        # chama o `eval` de cada comando em sequência (ver `straight_line`)
+        try:
+            fn = self._exec
+        except AttributeError:
+            fn = self._exec = straight_line(
+                [decl.eval for decl in self.declarations],
+                scoped=self.declares_names(),
+            )
+        fn(ctx)
+
+    def declares_names(self) -> bool:
+        """
+        Verifica se o bloco declara variáveis ou funções acessadas pelo nome
+        e, portanto, precisa de um escopo próprio.
+
+        Declarações associadas a slots pelo `Resolver` não contam.
+        """
+        return any(
+            isinstance(decl, Function) or (isinstance(decl, VarDef) and not isinstance(decl, VarDefSlot))
+            for decl in self.declarations
+        )
+
+
+def straight_line(evals: list[Callable], scoped: bool = False) -> Callable[[Ctx], None]:
+    """
+    Cria uma função que chama cada função de `evals` com o contexto, em ordem.
+
+    O código da função é gerado sem laços: `_n0(ctx); _n1(ctx); ...`. Assim o
+    despacho dos comandos acontece no interpretador do CPython, sem iterar
+    sobre uma tupla a cada execução do bloco. Se `scoped` for verdadeiro, os
+    comandos são executados num novo escopo.
+    """
+    lines = ["def _block(ctx):"]
+    if scoped:
+        lines.append("    ctx = ctx.push({})")
+    lines.extend(f"    _n{i}(ctx)" for i in range(len(evals)))
+    if len(lines) == 1:
+        lines.append("    pass")
+    namespace = {f"_n{i}": fn for i, fn in enumerate(evals)}
+    exec(compile("\n".join(lines) + "\n", "<lox:block>", "exec"), namespace)
+    return namespace["_block"]
+
+
+@dataclass(slots=True)
 class Function(Stmt):
     """
     Representa uma função.
@@ -356,9 +734,18 @@ class Function(Stmt):
     params: list[tuple[str, Optional[str]]]  # (nome, tipo)
     body: Block
     return_type: Optional[str] = None        # <-- Adicionado
+    _factory: Optional[Callable] = field(init=False, repr=False, compare=False)
+    _snapshot: Snapshot = field(init=False, repr=False, compare=False)
+
+    def eval(self, ctx: Ctx):
+        # O corpo da função é traduzido para Python na primeira declaração.
+        # Veja lox/codegen.py
+        from .codegen import compile_function
+
+        ctx.scope[self.name] = compile_function(self, ctx)
 
 
-@dataclass
+@dataclass(slots=True)
 class Class(Stmt):
     """
     Representa uma classe.
@@ -367,7 +754,7 @@ class Class(Stmt):
     """
 
 
-@dataclass
+@dataclass(slots=True)
 class ExprStmt(Stmt):
     """
     Representa uma expressão usada como statement.
@@ -384,18 +771,46 @@ def lox_str(value):
     """
     Converte um valor Python para sua representação string no Lox.
     """
-    if value is True:
-        return "true"
-    elif value is False:
-        return "false"
-    elif value is None:
-        return "nil"
-    elif isinstance(value, float) and value.is_integer():
-        return str(int(value))
+    try:
+        fn = LOX_STR[type(value)]
+    except KeyError:
+        return lox_str_fallback(value)
+    return fn(value)
+
+
+def lox_str_fallback(value):
+    """
+    Versão de `lox_str` para tipos que não estão na tabela `LOX_STR`, como
+    subclasses de float ou str.
+    """
+    if isinstance(value, float):
+        return float_str(value)
     elif isinstance(value, str):
         return value
     else:
         return str(value)
 
+
+def float_str(value: float) -> str:
+    if value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+# Formatação por tipo exato. Usamos type(value) como chave e não isinstance:
+# bool é subclasse de int, mas deve ser impresso como true/false.
+LOX_STR: dict[type, Callable[[Value], str]] = {
+    bool: lambda value: "true" if value else "false",
+    type(None): lambda value: "nil",
+    float: float_str,
+    int: str,
+    str: str,
+}
+
+
+# Iniciais dos nomes de variáveis que guardam apenas inteiros
+FORTRAN_INITIALS = frozenset("ijklmn")
+
+
 def is_fortran_int(name: str) -> bool:
-    return name and name[0] in "ijklmn"
\ No newline at end of file
+    return name[:1] in FORTRAN_INITIALS
\ No newline at end of file
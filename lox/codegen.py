@@ -0,0 +1,301 @@
+"""
+Tradução de funções Lox para código Python.
+
+Em vez de percorrer a árvore sintática a cada chamada, o `PyEmitter` gera o
+código fonte de uma função Python equivalente ao corpo da função Lox. O código
+é compilado uma única vez com `compile` + `exec` e passa a ser executado
+diretamente pela máquina virtual do CPython.
+
+Variáveis declaradas dentro da função (parâmetros e `var`) viram variáveis
+locais do Python, com um sufixo numérico único para respeitar o escopo de
+blocos e não colidir com palavras reservadas do Python. Os demais nomes são
+buscados no contexto em que a função foi declarada.
+
+Nós sem suporte levantam `NotImplementedError` e, nesse caso, a função é
+executada pelo interpretador através de `runtime.LoxFunction`.
+"""
+
+from itertools import count
+from math import isfinite
+from typing import Callable
+
+from .ast import (
+    And,
+    Assign,
+    BinOp,
+    Block,
+    Call,
+    Expr,
+    ExprStmt,
+    Function,
+    If,
+    Literal,
+    Neg,
+    Not,
+    Or,
+    Print,
+    Snapshot,
+    UnaryOp,
+    Var,
+    VarDef,
+    While,
+    is_fortran_int,
+    lox_str,
+)
+from .ctx import Ctx
+from .node import Node
+from .runtime import COMPARISONS, LoxFunction, arity_error, lookup, to_int, truthy
+
+
+class PyEmitter:
+    """
+    Gera o código Python de uma função Lox.
+
+    Assim como o `Compiler` da máquina virtual, procura um método
+    `stmt_<Classe>` ou `expr_<Classe>` para cada nó, seguindo a hierarquia de
+    classes.
+    """
+
+    def __init__(self):
+        self.lines: list[str] = []
+        self.scopes: list[dict[str, str]] = []
+        self.namespace: dict = {
+            "arity_error": arity_error,
+            "call": call,
+            "lookup": lookup,
+            "lox_str": lox_str,
+            "store": store,
+            "to_int": to_int,
+            "truthy": truthy,
+        }
+        self._counter = count()
+        self._consts: dict[int, str] = {}
+
+    def function(self, node: Function) -> str:
+        """
+        Retorna o código de uma fábrica `_make(ctx)` que cria a função Python
+        correspondente a `node` no contexto `ctx`.
+        """
+        self.scopes.append({})
+        names = [name for name, _ in node.params]
+        params = [self.declare(name) for name in names]
+        # Os parâmetros locais têm nomes diferentes dos parâmetros Lox, então
+        # a aridade é verificada aqui para que o erro seja o mesmo da
+        # `LoxFunction`
+        self.lines.append("def _make(ctx):")
+        self.lines.append("    def _function(*args):")
+        self.lines.append(f"        if len(args) != {len(params)}:")
+        self.lines.append(f"            raise arity_error({node.name!r}, {names!r}, args)")
+        if params:
+            self.lines.append(f"        {', '.join(params)}, = args")
+        self.block(node.body, 2)
+        self.lines.append(f"    _function.__name__ = _function.__qualname__ = {node.name!r}")
+        self.lines.append("    return _function")
+        self.scopes.pop()
+        return "\n".join(self.lines) + "\n"
+
+    #
+    # Nomes e constantes
+    #
+    def declare(self, name: str) -> str:
+        """
+        Cria uma variável local com nome único no escopo atual.
+        """
+        local = self.scopes[-1][name] = f"{name}_{next(self._counter)}"
+        return local
+
+    def lookup(self, name: str) -> str | None:
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def const(self, value) -> str:
+        """
+        Registra um valor no namespace da função e retorna o nome usado para
+        acessá-lo no código gerado.
+        """
+        try:
+            return self._consts[id(value)]
+        except KeyError:
+            name = self._consts[id(value)] = f"_c{len(self._consts)}"
+            self.namespace[name] = value
+            return name
+
+    def temp(self) -> str:
+        return f"_t{next(self._counter)}"
+
+    #
+    # Despacho
+    #
+    def stmt(self, node: Node, indent: int) -> None:
+        if isinstance(node, Expr):
+            self.lines.append("    " * indent + self.expr(node))
+            return
+        self._find(type(node), "stmt")(self, node, indent)
+
+    def expr(self, node: Node) -> str:
+        return self._find(type(node), "expr")(self, node)
+
+    def block(self, node: Node, indent: int) -> None:
+        size = len(self.lines)
+        self.stmt(node, indent)
+        if len(self.lines) == size:
+            self.lines.append("    " * indent + "pass")
+
+    @classmethod
+    def _find(cls, node_cls: type, kind: str) -> Callable:
+        for subtype in node_cls.mro():
+            try:
+                return getattr(cls, f"{kind}_{subtype.__name__}")
+            except AttributeError:
+                continue
+        raise NotImplementedError(f"não sei gerar código para {node_cls.__name__}")
+
+    #
+    # Comandos
+    #
+    def stmt_Block(self, node: Block, indent: int):
+        self.scopes.append({})
+        for decl in node.declarations:
+            self.stmt(decl, indent)
+        self.scopes.pop()
+
+    def stmt_ExprStmt(self, node: ExprStmt, indent: int):
+        self.stmt(node.expr, indent)
+
+    def stmt_Print(self, node: Print, indent: int):
+        self.lines.append("    " * indent + f"print(lox_str({self.expr(node.expr)}))")
+
+    def stmt_VarDef(self, node: VarDef, indent: int):
+        value = self.coerce(node.name, self.expr(node.value))
+        self.lines.append("    " * indent + f"{self.declare(node.name)} = {value}")
+
+    def stmt_If(self, node: If, indent: int):
+        prefix = "    " * indent
+        self.lines.append(f"{prefix}if {self.condition(node.condition)}:")
+        self.block(node.then_stmt, indent + 1)
+        self.lines.append(f"{prefix}else:")
+        self.block(node.else_stmt, indent + 1)
+
+    def stmt_While(self, node: While, indent: int):
+        self.lines.append("    " * indent + f"while {self.condition(node.condition)}:")
+        self.block(node.body, indent + 1)
+
+    #
+    # Expressões
+    #
+    def expr_Literal(self, node: Literal):
+        value = node.value
+        if value is None or type(value) in (bool, int, str):
+            return repr(value)
+        if type(value) is float and isfinite(value):
+            return repr(value)
+        return self.const(value)
+
+    def expr_Var(self, node: Var):
+        local = self.lookup(node.name)
+        if local is not None:
+            return local
+        return f"lookup(ctx, {node.name!r})"
+
+    def expr_Assign(self, node: Assign):
+        value = self.coerce(node.name, self.expr(node.value))
+        local = self.lookup(node.name)
+        if local is not None:
+            return f"({local} := {value})"
+        return f"store(ctx, {node.name!r}, {value})"
+
+    def expr_BinOp(self, node: BinOp):
+        left = self.expr(node.left)
+        right = self.expr(node.right)
+        try:
+            return f"({left} {COMPARISONS[node.op]} {right})"
+        except KeyError:
+            return f"{self.const(node.op)}({left}, {right})"
+
+    def expr_UnaryOp(self, node: UnaryOp):
+        return f"{self.const(node.op)}({self.expr(node.expr)})"
+
+    def expr_Not(self, node: Not):
+        return f"(not truthy({self.expr(node.expr)}))"
+
+    def expr_Neg(self, node: Neg):
+        return f"(-{self.expr(node.expr)})"
+
+    def expr_And(self, node: And):
+        tmp = self.temp()
+        return f"({tmp} if not truthy({tmp} := {self.expr(node.left)}) else {self.expr(node.right)})"
+
+    def expr_Or(self, node: Or):
+        tmp = self.temp()
+        return f"({tmp} if truthy({tmp} := {self.expr(node.left)}) else {self.expr(node.right)})"
+
+    def expr_Call(self, node: Call):
+        args = [self.expr(node.callee), *map(self.expr, node.params)]
+        return f"call({', '.join(args)})"
+
+    #
+    # Auxiliares
+    #
+    def condition(self, node: Expr) -> str:
+        # Comparações sempre produzem booleanos e dispensam truthy()
+        if isinstance(node, BinOp) and node.op in COMPARISONS:
+            return self.expr(node)
+        return f"truthy({self.expr(node)})"
+
+    def coerce(self, name: str, value: str) -> str:
+        if is_fortran_int(name):
+            return f"to_int({value})"
+        return value
+
+
+def compile_function(node: Function, ctx: Ctx) -> Callable:
+    """
+    Cria a função Python correspondente a `node` no contexto `ctx`.
+
+    A fábrica gerada é guardada no próprio nó, de modo que declarar a mesma
+    função várias vezes (por exemplo, dentro de um laço) não gera o código
+    novamente. A fábrica é refeita se algum nó da árvore for substituído. Se
+    o corpo usar algum nó sem suporte, retorna uma `LoxFunction`
+    interpretada.
+    """
+    try:
+        stale = not node._snapshot.matches(node)
+    except AttributeError:
+        stale = True
+    if stale:
+        node._factory = make_factory(node)
+        node._snapshot = Snapshot.of(node)
+    make = node._factory
+    if make is None:
+        params = [name for name, _ in node.params]
+        return LoxFunction(node.name, params, node.body.declarations, ctx)
+    return make(ctx)
+
+
+def make_factory(node: Function) -> Callable[[Ctx], Callable] | None:
+    emitter = PyEmitter()
+    try:
+        src = emitter.function(node)
+        code = compile(src, f"<lox:{node.name}>", "exec")
+    except (NotImplementedError, SyntaxError):
+        return None
+    namespace = emitter.namespace
+    exec(code, namespace)
+    return namespace["_make"]
+
+
+#
+# Funções usadas pelo código gerado
+#
+def store(ctx: Ctx, name: str, value):
+    ctx[name] = value
+    return value
+
+
+def call(func, *args):
+    if not callable(func):
+        raise TypeError(f"{lox_str(func)} não é uma função!")
+    return func(*args)
+
@@ -31,16 +31,25 @@ class _Builtins(dict):
 
 BUILTINS = _Builtins()
 
+# Sentinela usada por `Ctx.get` para diferenciar variáveis ausentes de nil
+MISSING = object()
 
-@dataclass
+
+@dataclass(slots=True)
 class Ctx:
     """
-    Contexto de execução. Por enquanto é só um dicionário que armazena nomes
-    das variáveis e seus respectivos valores.
+    Contexto de execução. Armazena um dicionário com os nomes das variáveis e
+    seus respectivos valores.
+
+    Variáveis locais resolvidas em tempo de compilação ficam na lista `slots`
+    e são acessadas por índice. O `Resolver` aloca as variáveis de blocos
+    aninhados no mesmo quadro, portanto basta o índice para encontrá-las, sem
+    percorrer a cadeia de contextos pais.
     """
 
     scope: ScopeDict = field(default_factory=dict)
     parent: Optional["Ctx"] = field(default_factory=lambda: Ctx(BUILTINS, None))
+    slots: list["Value"] = field(default_factory=list)
 
     @classmethod
     def from_dict(cls, env: ScopeDict) -> "Ctx":
@@ -53,15 +62,26 @@ class Ctx:
         """
         Obtém o valor de uma variável pelo nome.
         """
+        value = self.get(name, MISSING)
+        if value is MISSING:
+            raise KeyError(f"Variable '{name}' not found in context.")
+        return value
+
+    def get(self, name: str, default=None):
+        """
+        Obtém o valor de uma variável pelo nome ou `default` se ela não
+        existir.
+
+        Não usa exceções, que são caras quando a variável está num escopo
+        externo.
+        """
         this = self
-        while True:
-            try:
-                return this.scope[name]
-            except KeyError:
-                pass
-            if this.parent is None:
-                raise KeyError(f"Variable '{name}' not found in context.")
+        while this is not None:
+            value = this.scope.get(name, MISSING)
+            if value is not MISSING:
+                return value
             this = this.parent
+        return default
 
     def __setitem__(self, name: str, value: "Value") -> None:
         """
@@ -139,8 +159,10 @@ class Ctx:
     def push(self, env: ScopeDict) -> "Ctx":
         """
         Empilha um novo escopo no contexto atual.
+
+        O novo contexto compartilha a lista de slots do atual.
         """
-        return Ctx(env, self)
+        return Ctx(env, self, self.slots)
 
     def is_global(self) -> bool:
         """
@@ -0,0 +1,384 @@
+"""
+Compilação JIT de laços numéricos usando o Numba.
+
+Laços `while` cujo corpo usa apenas variáveis numéricas, aritmética,
+comparações, atribuições e condicionais podem ser traduzidos para uma função
+Python equivalente e compilados com `numba.njit`. A máquina virtual conta
+quantas vezes cada laço desses volta para o início e, depois que ele fica
+"quente", troca a execução pela versão compilada.
+
+O Numba é uma dependência opcional (`pip install lox[jit]`) e a compilação
+só é usada quando a variável de ambiente LOX_JIT está definida. Caso
+contrário, nenhum laço é marcado para compilação e o Numba nem é importado.
+Funções compiladas ficam em um cache do módulo, compartilhado por todos os
+laços com o mesmo código, para que recompilar um programa não recompile seus
+laços.
+
+Inteiros são representados como int64 na versão compilada. As operações com
+inteiros verificam estouro (ver `checked_ops`) e, se ele acontecer, a versão
+compilada é abandonada sem alterar o contexto e o laço continua na máquina
+virtual, com os inteiros do Python.
+"""
+
+import os
+from functools import cache
+from importlib.util import find_spec
+from typing import Callable, Optional, Union
+
+from . import runtime as op
+from .ast import (
+    And,
+    Assign,
+    BinOp,
+    Block,
+    Expr,
+    ExprStmt,
+    If,
+    Literal,
+    Or,
+    Var,
+    VarSlot,
+    While,
+    is_fortran_int,
+)
+from .ctx import Ctx
+from .node import Node
+
+# Habilita a compilação de laços quentes
+ENABLED = os.environ.get("LOX_JIT", "") not in ("", "0")
+
+# Número de iterações antes de tentar compilar um laço. Compilar com o LLVM
+# leva dezenas de milissegundos, então só vale a pena para laços longos.
+HOT_LOOP_THRESHOLD = 10_000
+
+# Variáveis são identificadas pelo nome ou, se forem locais, pelo slot
+Key = Union[str, int]
+
+INT64_MIN = -(2**63)
+INT64_MAX = 2**63 - 1
+
+# Limites usados nas operações com inteiros compiladas (ver `checked_ops`)
+SAFE_MIN = -(2**62)
+SAFE_MAX = 2**62
+
+ARITHMETIC = {
+    op.lox_add: "+",
+    op.lox_sub: "-",
+    op.lox_mul: "*",
+    op.lox_truediv: "/",
+}
+# Funções que implementam as operações com inteiros na versão compilada
+CHECKED = {
+    "+": "_add",
+    "-": "_sub",
+    "*": "_mul",
+    "/": "_div",
+}
+
+
+def is_available() -> bool:
+    """
+    Verifica se a compilação está habilitada e o Numba está instalado.
+    """
+    return ENABLED and has_numba()
+
+
+@cache
+def has_numba() -> bool:
+    """
+    Verifica se o Numba está instalado, sem importá-lo.
+    """
+    return find_spec("numba") is not None
+
+
+@cache
+def numba():
+    """
+    Importa o Numba na primeira vez em que um laço é compilado.
+    """
+    import numba
+
+    return numba
+
+
+def supports(node: Node) -> bool:
+    """
+    Verifica se a estrutura do nó permite compilá-lo com o Numba.
+
+    A verificação de tipos acontece depois, em `TypeSpecializer`, com os
+    valores das variáveis no momento da execução.
+    """
+    match node:
+        case Literal(value=value):
+            return type(value) in (int, float, bool)
+        case Var():
+            return type(node) in (Var, VarSlot)
+        case Assign(value=value):
+            return supports(value)
+        case BinOp(left=left, right=right, op=fn):
+            return (fn in ARITHMETIC or fn in op.COMPARISONS) and supports(left) and supports(right)
+        case And(left=left, right=right) | Or(left=left, right=right):
+            return supports(left) and supports(right)
+        case ExprStmt(expr=expr):
+            return supports(expr)
+        case Block(declarations=declarations):
+            return all(supports(decl) for decl in declarations)
+        case If(condition=cond, then_stmt=then_stmt, else_stmt=else_stmt):
+            return supports(cond) and supports(then_stmt) and supports(else_stmt)
+        case While(condition=cond, body=body):
+            return supports(cond) and supports(body)
+    return False
+
+
+def key(node: Var | Assign) -> Key:
+    """
+    Identificador da variável lida ou escrita pelo nó.
+    """
+    try:
+        return node.slot  # type: ignore[union-attr]
+    except AttributeError:
+        return node.name
+
+
+def variables(node: Node) -> list[Key]:
+    """
+    Lista as variáveis usadas no nó, na ordem em que aparecem.
+    """
+    keys: dict[Key, None] = {}
+    for child in node.descendants():
+        if isinstance(child, (Var, Assign)):
+            keys[key(child)] = None
+    return list(keys)
+
+
+class TypeSpecializer:
+    """
+    Gera o código fonte de um laço especializado para os tipos das variáveis.
+
+    Cada variável mantém o tipo que tinha na entrada do laço (int ou float).
+    Se alguma atribuição mudar o tipo de uma variável, a especialização é
+    abortada levantando `TypeError`.
+    """
+
+    def __init__(self, types: dict[Key, type]):
+        self.types = types
+        self.slots = {k: f"v{i}" for i, k in enumerate(types)}
+        self.lines: list[str] = []
+
+    def function(self, loop: While) -> str:
+        """
+        Retorna o código de uma função que executa o laço e retorna os valores
+        finais das variáveis.
+        """
+        args = ", ".join(self.slots.values())
+        self.lines.append(f"def _loop({args}):")
+        self.stmt(loop, 1)
+        self.lines.append(f"    return ({args},)")
+        return "\n".join(self.lines) + "\n"
+
+    def stmt(self, node: Node, indent: int) -> None:
+        prefix = "    " * indent
+        match node:
+            case While(condition=cond, body=body):
+                self.lines.append(f"{prefix}while {self.condition(cond)}:")
+                self.block(body, indent + 1)
+            case If(condition=cond, then_stmt=then_stmt, else_stmt=else_stmt):
+                self.lines.append(f"{prefix}if {self.condition(cond)}:")
+                self.block(then_stmt, indent + 1)
+                self.lines.append(f"{prefix}else:")
+                self.block(else_stmt, indent + 1)
+            case Block(declarations=declarations):
+                for decl in declarations:
+                    self.stmt(decl, indent)
+            case ExprStmt(expr=expr):
+                self.stmt(expr, indent)
+            case Assign():
+                self.lines.append(f"{prefix}{self.slots[key(node)]} = {self.assign(node)}")
+            case _:
+                self.lines.append(prefix + self.expr(node)[0])
+
+    def block(self, node: Node, indent: int) -> None:
+        size = len(self.lines)
+        self.stmt(node, indent)
+        if len(self.lines) == size:
+            self.lines.append("    " * indent + "pass")
+
+    def assign(self, node: Assign) -> str:
+        code, kind = self.expr(node.value)
+        expected = self.types[key(node)]
+        if kind is not expected or (is_fortran_int(node.name) and kind is not int):
+            raise TypeError(f"atribuição muda o tipo de {node.name}")
+        return code
+
+    def condition(self, node: Expr) -> str:
+        code, kind = self.expr(node)
+        if kind is not bool:
+            raise TypeError("condição do laço não é booleana")
+        return code
+
+    def expr(self, node: Node) -> tuple[str, type]:
+        """
+        Retorna o código e o tipo de uma expressão.
+        """
+        match node:
+            case Literal(value=value):
+                return repr(value), type(value)
+            case Var():
+                return self.slots[key(node)], self.types[key(node)]
+            case Assign():
+                k = key(node)
+                return f"({self.slots[k]} := {self.assign(node)})", self.types[k]
+            case BinOp(left=left, right=right, op=fn):
+                left_code, left_type = self.expr(left)
+                right_code, right_type = self.expr(right)
+                if left_type is bool or right_type is bool:
+                    raise TypeError("operação com booleanos")
+                if fn in op.COMPARISONS:
+                    return f"({left_code} {op.COMPARISONS[fn]} {right_code})", bool
+                symbol = ARITHMETIC[fn]
+                if left_type is int and right_type is int:
+                    return f"{CHECKED[symbol]}({left_code}, {right_code})", int
+                return f"({left_code} {symbol} {right_code})", float
+            case And(left=left, right=right):
+                return f"({self.condition(left)} and {self.condition(right)})", bool
+            case Or(left=left, right=right):
+                return f"({self.condition(left)} or {self.condition(right)})", bool
+        raise TypeError(f"nó não suportado: {type(node).__name__}")
+
+
+class HotLoop:
+    """
+    Contador de execuções e cache de versões compiladas de um laço.
+
+    A máquina virtual guarda um objeto destes na tabela de constantes para
+    cada laço que pode ser compilado.
+    """
+
+    def __init__(self, node: While, start: int, end: int):
+        self.node = node
+        self.start = start
+        self.end = end
+        self.hotness = 0
+        self.keys = variables(node)
+        self.assigned = {key(child) for child in node.descendants() if isinstance(child, Assign)}
+        self.cache: dict[tuple[type, ...], Optional[Callable]] = {}
+
+    def run(self, ctx: Ctx) -> bool:
+        """
+        Executa o laço até o fim usando a versão compilada.
+
+        Retorna False, sem alterar o contexto, se não for possível usar a
+        versão compilada com os valores atuais das variáveis.
+        """
+        slots = ctx.slots
+        try:
+            values = [slots[k] if type(k) is int else ctx[k] for k in self.keys]
+        except KeyError:
+            values = None
+
+        if values is None or not all(map(is_jit_value, values)):
+            self.hotness = 0
+            return False
+
+        types = tuple(map(type, values))
+        try:
+            fn = self.cache[types]
+        except KeyError:
+            fn = self.cache[types] = self.compile(types)
+        if fn is None:
+            self.hotness = 0
+            return False
+
+        try:
+            results = fn(*values)
+        except ArithmeticError:
+            # Estouro de int64 ou divisão por zero: a máquina virtual refaz o
+            # laço a partir do estado atual, que não foi alterado
+            self.cache[types] = None
+            self.hotness = 0
+            return False
+        for k, value in zip(self.keys, results):
+            if k not in self.assigned:
+                continue
+            if type(k) is int:
+                slots[k] = value
+            else:
+                ctx[k] = value
+        return True
+
+    def compile(self, types: tuple[type, ...]) -> Optional[Callable]:
+        """
+        Gera e compila a versão especializada do laço para os tipos dados.
+        """
+        try:
+            src = TypeSpecializer(dict(zip(self.keys, types))).function(self.node)
+        except TypeError:
+            return None
+        return compile_loop(src, types)
+
+
+@cache
+def compile_loop(src: str, types: tuple[type, ...]) -> Optional[Callable]:
+    """
+    Compila o código gerado por `TypeSpecializer` para os tipos dados.
+
+    O resultado é guardado em cache, de modo que laços idênticos são
+    compilados uma única vez por processo.
+    """
+    nb = numba()
+    namespace: dict = dict(checked_ops())
+    exec(compile(src, "<lox:jit>", "exec"), namespace)
+    fn = nb.njit(namespace["_loop"])
+    try:
+        fn.compile(tuple(nb.typeof(kind()) for kind in types))
+    except Exception:
+        return None
+    return fn
+
+
+@cache
+def checked_ops() -> dict[str, Callable]:
+    """
+    Operações com inteiros que levantam `OverflowError` em vez de dar a volta
+    nos limites do int64.
+
+    A verificação é feita antes da operação, já que o LLVM supõe que operações
+    com sinal nunca estouram. Ela é conservadora (os limites são ±2**62): um
+    falso positivo apenas devolve o laço para a máquina virtual.
+
+    A divisão segue `lox_truediv` (divisão inteira com arredondamento para
+    baixo).
+    """
+
+    def _add(a, b):
+        if not (SAFE_MIN <= a <= SAFE_MAX and SAFE_MIN <= b <= SAFE_MAX):
+            raise OverflowError
+        return a + b
+
+    def _sub(a, b):
+        if not (SAFE_MIN <= a <= SAFE_MAX and SAFE_MIN <= b <= SAFE_MAX):
+            raise OverflowError
+        return a - b
+
+    def _mul(a, b):
+        if not (SAFE_MIN <= float(a) * float(b) <= SAFE_MAX):
+            raise OverflowError
+        return a * b
+
+    def _div(a, b):
+        if not SAFE_MIN <= a <= SAFE_MAX:
+            raise OverflowError
+        return a // b
+
+    njit = numba().njit
+    return {fn.__name__: njit(fn) for fn in (_add, _sub, _mul, _div)}
+
+
+def is_jit_value(value) -> bool:
+    """
+    Verifica se o valor pode ser representado na versão compilada.
+    """
+    kind = type(value)
+    if kind is float:
+        return True
+    return kind is int and INT64_MIN <= value <= INT64_MAX
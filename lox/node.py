@@ -5,7 +5,7 @@ Define estrutura de dados básicas para as árvores sintáticas.
 """
 
 from abc import ABC
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from functools import singledispatch
 from types import BuiltinFunctionType, FunctionType, MethodDescriptorType, MethodType
 from typing import (
@@ -38,6 +38,9 @@ class Node(ABC):
     criar subclasses que implementem os métodos abstratos definidos aqui.
     """
 
+    # Os nós são declarados com @dataclass(slots=True) e não possuem __dict__
+    __slots__ = ()
+
     def eval(self, ctx):
         name = type(self).__name__
         raise NotImplementedError(f"Método eval não implementado para {name}!")
@@ -61,7 +64,7 @@ class Node(ABC):
 
         Um nó é considerado uma folha se não tem filhos do tipo `Node`.
         """
-        for name in self.__annotations__:
+        for name in node_fields(self):
             value = getattr(self, name)
             if isinstance(value, (Node, list, tuple, dict)):
                 return False
@@ -87,10 +90,10 @@ class Node(ABC):
         # o nome da classe e um parêntese de abertura
         yield indent_level, str(self.__class__.__name__) + "("
 
-        # O attributo "__annotations__" é um dicionário que contém os nomes dos
-        # atributos declarados e seus tipos correspondentes. Vamos pegar os tipos
-        # na ordem de declaração e imprimir o nome e valores correspondentes
-        for attr in self.__annotations__:
+        # A função "node_fields" retorna os nomes dos atributos declarados no
+        # dataclass, incluindo os herdados. Vamos pegar os atributos na ordem
+        # de declaração e imprimir o nome e valores correspondentes
+        for attr in node_fields(self):
             # attr é o nome do atributo. Obtemos o valor do atributo usando a
             # função `getattr` do Python
             value = getattr(self, attr)
@@ -159,7 +162,7 @@ class Node(ABC):
         """
 
         # Primeiro visitamos os filhos do nó atual.
-        for name in self.__annotations__:
+        for name in node_fields(self):
             value = getattr(self, name)
             if isinstance(value, Node):
                 value.visit(visitors)
@@ -183,7 +186,7 @@ class Node(ABC):
         do nó atual. Isso é útil para percorrer a árvore sintática de forma
         recursiva.
         """
-        for name in self.__annotations__:
+        for name in node_fields(self):
             value = getattr(self, name)
             if isinstance(value, Node):
                 yield value
@@ -203,7 +206,7 @@ class Node(ABC):
         método ajuda a encontrar nós não-tranformados que podem ter escapado seu
         Transformer.
         """
-        for name in self.__annotations__:
+        for name in node_fields(self):
             value = getattr(self, name)
             if isinstance(value, (Tree, Token)):
                 yield value
@@ -258,7 +261,7 @@ class Node(ABC):
         O método `replace_child` substitui um filho do nó atual por um novo
         nó. Isso é útil para modificar a árvore sintática de forma recursiva.
         """
-        for name in self.__annotations__:
+        for name in node_fields(self):
             value = getattr(self, name)
             if isinstance(value, Node):
                 if value is old:
@@ -491,6 +494,29 @@ def _(obj) -> str:
     return obj.__name__
 
 
+_NODE_FIELDS: dict[type, tuple[str, ...]] = {}
+
+
+def node_fields(node: Node) -> tuple[str, ...]:
+    """
+    Nomes dos atributos públicos do nó, na ordem de declaração.
+
+    Atributos privados (iniciados com "_") guardam caches e não fazem parte da
+    árvore.
+    """
+    cls = type(node)
+    try:
+        return _NODE_FIELDS[cls]
+    except KeyError:
+        pass
+    try:
+        names = [f.name for f in fields(cls)]
+    except TypeError:
+        names = list(getattr(cls, "__annotations__", {}))
+    result = _NODE_FIELDS[cls] = tuple(n for n in names if not n.startswith("_"))
+    return result
+
+
 def visit_once(obj: Node, visitors: dict[type[Node], Callable[[N], Any]]) -> None:
     """
     Visita um nó e executa a primeira função consistente com o tipo do objecto.
@@ -512,7 +538,7 @@ def can_print_as_leaf(node: Node) -> bool:
     """
     while node:
         args = []
-        for attr in node.__annotations__:
+        for attr in node_fields(node):
             obj = getattr(node, attr)
             if isinstance(obj, (list, tuple)) and obj:
                 return False
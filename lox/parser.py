@@ -5,6 +5,7 @@ Define a gramática da Linguagem e funções para realizar a análise sintática
 análise léxica, etc.
 """
 
+from functools import cache
 from pathlib import Path
 from typing import Iterator
 
@@ -23,11 +24,27 @@ ast_parser = Lark(
     parser="lalr",
     start=["start", "expr"],
 )
-cst_parser = Lark(
-    GRAMMAR_PATH.open(),
-    parser="lalr",
-    start=["start", "expr"],
-)
+
+
+@cache
+def _build_cst_parser() -> Lark:
+    """
+    Parser sem transformador, usado apenas por `parse_cst`.
+
+    É construído no primeiro uso para não dobrar o custo de importação.
+    """
+    return Lark(
+        GRAMMAR_PATH.open(),
+        parser="lalr",
+        start=["start", "expr"],
+    )
+
+
+def __getattr__(name: str):
+    # Mantém `cst_parser` disponível como atributo do módulo
+    if name == "cst_parser":
+        return _build_cst_parser()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def parse(src: str) -> Program:
@@ -64,8 +81,10 @@ def parse_expr(src: str) -> Expr:
             Código fonte a ser analisado.
 
     Examples:
+        >>> parse_expr("x + 2")
+        BinOpAdd(left=Var(name='x'), right=Literal(value=2), op=lox_add)
         >>> parse_expr("1 + 2")
-        BinOp(left=Literal(value=1), right=Literal(value=2), op=op.add)
+        Literal(value=3)
         >>> ctx = Ctx()
         >>> parse_expr("1 + 2 * 3").eval(Ctx())
         7
@@ -92,7 +111,7 @@ def parse_cst(src: str, expr: bool = False) -> Tree:
             Se True, analisa o código como se fosse apenas uma expressão.
     """
     start = "expr" if expr else "start"
-    return cst_parser.parse(src, start=start)
+    return _build_cst_parser().parse(src, start=start)
 
 
 def lex(src: str) -> Iterator[Token]:
@@ -0,0 +1,191 @@
+"""
+Resolução de variáveis locais.
+
+O `Resolver` percorre o programa antes da execução e associa cada variável
+declarada dentro de um bloco a uma posição fixa (slot) na lista `ctx.slots`.
+Os nós `Var`, `Assign` e `VarDef` que se referem a essas variáveis são
+substituídos por `VarSlot`, `AssignSlot` e `VarDefSlot`, que acessam a lista
+por índice em vez de procurar o nome nos dicionários do contexto.
+
+Variáveis globais, variáveis fornecidas pelo ambiente e variáveis capturadas
+por funções continuam sendo acessadas pelo nome.
+
+A conversão de variáveis com nomes de inteiros implícitos (i, j, k...) também
+é decidida aqui: os nós `*SlotInt` convertem o valor para inteiro e os demais
+guardam o valor diretamente.
+
+Depois da resolução, combinações comuns de nós envolvendo slots são fundidas
+em um único nó especializado (ver `fuse`).
+"""
+
+from dataclasses import replace
+
+from .ast import (
+    AddConstSlot,
+    AddConstSlotInt,
+    Assign,
+    AssignSlot,
+    AssignSlotInt,
+    BinOp,
+    BinOpSlotConst,
+    BinOpSlots,
+    Block,
+    Function,
+    Literal,
+    Var,
+    VarDef,
+    VarDefSlot,
+    VarDefSlotInt,
+    VarSlot,
+    While,
+    WhileCmp,
+    is_fortran_int,
+)
+from .node import Node, node_fields
+from .runtime import COMPARISONS, lox_add
+
+
+class Resolver:
+    """
+    Substitui variáveis locais por acessos a slots.
+
+    Blocos irmãos reutilizam os mesmos slots, já que suas variáveis nunca
+    existem ao mesmo tempo. Depois de resolver um programa, o atributo
+    `n_slots` guarda o tamanho necessário para a lista de slots.
+    """
+
+    def __init__(self):
+        self.scopes: list[dict[str, int]] = []
+        self.captured: list[set[str]] = []
+        self.next_slot = 0
+        self.n_slots = 0
+
+    def resolve(self, node: Node) -> Node:
+        """
+        Retorna uma versão resolvida do nó.
+
+        Nós que não mudam são retornados sem modificação; os demais são
+        recriados para que a árvore original nunca seja alterada.
+        """
+        match node:
+            case Block():
+                return self.resolve_block(node)
+            case Function():
+                return node
+            case VarSlot() | AssignSlot() | VarDefSlot():
+                return node
+            case Var(name=name):
+                slot = self.lookup(name)
+                if slot is None:
+                    return node
+                return VarSlot(name, slot=slot)
+            case Assign(name=name, value=value):
+                value = self.resolve(value)
+                slot = self.lookup(name)
+                if slot is None:
+                    return self.rebuild(node, value=value)
+                cls = AssignSlotInt if is_fortran_int(name) else AssignSlot
+                return fuse(cls(name, value, slot=slot))
+            case VarDef(name=name, value=value, type_hint=type_hint):
+                value = self.resolve(value)
+                if not self.scopes or name in self.captured[-1]:
+                    return self.rebuild(node, value=value)
+                cls = VarDefSlotInt if is_fortran_int(name) else VarDefSlot
+                return cls(name, value, type_hint, slot=self.declare(name))
+        return fuse(self.resolve_children(node))
+
+    def resolve_block(self, block: Block) -> Block:
+        self.scopes.append({})
+        self.captured.append(captured_names(block))
+        start = self.next_slot
+        try:
+            declarations = [self.resolve(decl) for decl in block.declarations]
+        finally:
+            self.scopes.pop()
+            self.captured.pop()
+            self.next_slot = start
+        return self.rebuild(block, declarations=declarations)
+
+    def resolve_children(self, node: Node) -> Node:
+        changes = {}
+        for attr in node_fields(node):
+            value = getattr(node, attr)
+            if isinstance(value, Node):
+                changes[attr] = self.resolve(value)
+            elif isinstance(value, list):
+                changes[attr] = [
+                    self.resolve(item) if isinstance(item, Node) else item
+                    for item in value
+                ]
+        return self.rebuild(node, **changes)
+
+    def rebuild(self, node: Node, **changes) -> Node:
+        """
+        Cria uma cópia do nó com os filhos modificados, se houver mudanças.
+        """
+        for attr, value in changes.items():
+            old = getattr(node, attr)
+            if isinstance(value, list):
+                if any(a is not b for a, b in zip(value, old)):
+                    return replace(node, **changes)
+            elif value is not old:
+                return replace(node, **changes)
+        return node
+
+    def declare(self, name: str) -> int:
+        slot = self.scopes[-1][name] = self.next_slot
+        self.next_slot += 1
+        self.n_slots = max(self.n_slots, self.next_slot)
+        return slot
+
+    def lookup(self, name: str) -> int | None:
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+
+def fuse(node: Node) -> Node:
+    """
+    Substitui padrões comuns envolvendo slots por "superinstruções".
+
+        i = i + n              =>  AddConstSlot
+        a op b                 =>  BinOpSlots  (a e b locais)
+        a op n                 =>  BinOpSlotConst  (a local, n número)
+        while (a < n) { ... }  =>  WhileCmp
+    """
+    match node:
+        case BinOpSlots() | BinOpSlotConst() | AddConstSlot() | WhileCmp():
+            return node
+        case AssignSlot(
+            name=name,
+            slot=slot,
+            value=BinOp(left=VarSlot(slot=left), right=Literal(value=n), op=op),
+        ) if left == slot and op is lox_add and type(n) in (int, float):
+            cls = AddConstSlotInt if isinstance(node, AssignSlotInt) else AddConstSlot
+            return cls(name, node.value, slot=slot, increment=n)
+        case BinOp(left=VarSlot(slot=left), right=VarSlot(slot=right), op=op):
+            return BinOpSlots(node.left, node.right, op, left_slot=left, right_slot=right)
+        case BinOp(left=VarSlot(slot=left), right=Literal(value=n), op=op) if type(n) in (int, float):
+            return BinOpSlotConst(node.left, node.right, op, left_slot=left, constant=n)
+        case While(condition=BinOpSlotConst(left_slot=slot, constant=n, op=op) as cond, body=body) if (
+            op in COMPARISONS
+        ):
+            return WhileCmp(cond, body, slot=slot, limit=n, compare=op)
+    return node
+
+
+def captured_names(node: Node) -> set[str]:
+    """
+    Nomes de variáveis usados dentro de funções declaradas no nó.
+
+    Funções podem sobreviver ao bloco em que foram declaradas, portanto as
+    variáveis que elas usam não podem morar em slots reutilizáveis.
+    """
+    names = set()
+    for child in node.descendants():
+        if isinstance(child, Function):
+            for item in child.descendants():
+                if isinstance(item, (Var, Assign)):
+                    names.add(item.name)
+    return names
@@ -3,7 +3,7 @@ from dataclasses import dataclass
 from operator import add, eq, ge, gt, le, lt, mul, ne, neg, not_, sub, truediv
 from typing import TYPE_CHECKING
 
-from .ctx import Ctx
+from .ctx import MISSING, Ctx
 
 if TYPE_CHECKING:
     from .ast import Stmt, Value
@@ -45,7 +45,9 @@ class LoxFunction:
     ctx: Ctx
 
     def __call__(self, *args):
-        env = dict(zip(self.args, args, strict=True))
+        if len(args) != len(self.args):
+            raise arity_error(self.name, self.args, args)
+        env = dict(zip(self.args, args))
         env = self.ctx.push(env)
 
         try:
@@ -74,6 +76,16 @@ class LoxError(Exception):
 nan = float("nan")
 inf = float("inf")
 
+# Símbolos dos operadores de comparação do Python
+COMPARISONS = {
+    lt: "<",
+    le: "<=",
+    gt: ">",
+    ge: ">=",
+    eq: "==",
+    ne: "!=",
+}
+
 
 def print(value: "Value"):
     """
@@ -107,6 +119,35 @@ def truthy(value: "Value") -> bool:
     return True
 
 
+def lookup(ctx: Ctx, name: str):
+    """
+    Busca uma variável em todos os escopos do contexto.
+    """
+    value = ctx.get(name, MISSING)
+    if value is MISSING:
+        raise NameError(f"variável {name} não existe!")
+    return value
+
+
+def to_int(value):
+    """
+    Converte valores para inteiro seguindo a regra de inteiros implícitos.
+
+    Valores que não podem ser convertidos são mantidos como estão.
+    """
+    try:
+        return int(value)
+    except Exception:
+        return value
+
+
+def arity_error(name: str, params: list[str], args: tuple) -> TypeError:
+    """
+    Erro para chamadas de funções Lox com o número errado de argumentos.
+    """
+    return TypeError(f"{name}({', '.join(params)}) espera {len(params)} argumentos, mas recebeu {len(args)}!")
+
+
 def lox_add(a, b):
     if isinstance(a, int) and isinstance(b, int):
         return int(a + b)
@@ -134,9 +175,14 @@ def lox_truediv(a, b):
     return float(a) / float(b)
 
 
+def lox_not(a):
+    return not truthy(a)
+
+
 __all__ += [
     "lox_add",
     "lox_sub",
     "lox_mul",
     "lox_truediv",
+    "lox_not",
 ]
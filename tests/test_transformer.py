@@ -0,0 +1,69 @@
+from lox import *
+from lox.ast import *
+
+
+class TestConstantFolding:
+    def test_operações_com_literais_são_calculadas(self):
+        assert parse_expr("3.14 > 3 and 3.14 < 4") == Literal(True)
+        assert parse_expr("-2 * 3") == Literal(-6)
+        assert parse_expr("!nil") == Literal(True)
+
+    def test_operadores_lógicos_com_constante_à_esquerda(self):
+        assert parse_expr("nil or x") == Var("x")
+        assert parse_expr("false and x") == Literal(False)
+        assert isinstance(parse_expr("x or 1"), Or)
+
+    def test_erros_ficam_para_a_execução(self):
+        expr = parse_expr("1 / 0")
+        assert isinstance(expr, BinOp)
+
+
+class TestNumbers:
+    def test_literais_numéricos(self):
+        assert parse_expr("42") == Literal(42)
+        assert type(parse_expr("42").value) is int
+        assert parse_expr("3.25") == Literal(3.25)
+
+    def test_constantes_repetidas_compartilham_valor(self):
+        call = parse_expr("f(1000.5, 1000.5)")
+        first, second = call.params
+        assert first is not second
+        assert first.value is second.value
+
+
+class TestBinOpClasses:
+    def test_cada_operador_tem_sua_classe(self):
+        expr = parse_expr("x + 1 < y")
+        assert type(expr).__name__ == "BinOpLt"
+        assert type(expr.left).__name__ == "BinOpAdd"
+        assert isinstance(expr, BinOp)
+
+    def test_avaliação(self):
+        ctx = Ctx.from_dict({"x": 10, "y": 4})
+        assert parse_expr("x / y").eval(ctx) == 2
+        assert parse_expr("x - y * 2.0").eval(ctx) == 2.0
+        assert parse_expr("x != y").eval(ctx) is True
+
+
+class TestUnaryOps:
+    def test_operadores_prefixos_têm_nós_próprios(self):
+        assert parse_expr("!x") == Not(Var("x"))
+        assert parse_expr("-x") == Neg(Var("x"))
+
+    def test_avaliação(self):
+        ctx = Ctx.from_dict({"x": 2, "y": None})
+        assert parse_expr("-x").eval(ctx) == -2
+        assert parse_expr("!y").eval(ctx) is True
+        assert parse_expr("!!x").eval(ctx) is True
+
+
+class TestParseCst:
+    def test_árvore_do_lark(self):
+        tree = parse_cst("print 1;")
+        assert tree.data == "program"
+        assert parse_cst("1 + x", expr=True).children
+
+    def test_cst_parser_continua_disponível(self):
+        from lox.parser import cst_parser
+
+        assert cst_parser.parse("print 1;", start="start") == parse_cst("print 1;")
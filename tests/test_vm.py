@@ -0,0 +1,204 @@
+import pytest
+
+from lox import *
+from lox import jit
+from lox.ast import VarDef
+from lox.vm import (
+    ADD_CONST_SLOT,
+    BINOP_NAMES,
+    BINOP_SLOTS,
+    COMPARE_NAME_JUMP,
+    COMPARE_SLOT_JUMP,
+    EXEC,
+    JUMP_IF_FALSE,
+    LOAD_SLOT,
+    POP,
+    Halt,
+    compile_program,
+    execute,
+    run,
+    thread,
+)
+
+
+def run_src(src: str, env: dict) -> Ctx:
+    ctx = Ctx.from_dict(env)
+    code, consts, names = compile_program(parse(src))
+    run(code, consts, names, ctx)
+    return ctx
+
+
+class TestBytecodeVM:
+    def test_laço_while_compila_para_saltos(self):
+        code, _, _ = compile_program(parse("while (i < n) i = i + 1;"))
+        assert JUMP_IF_FALSE in code[::2]
+
+    def test_superinstruções_com_nomes(self, capsys):
+        src = "for (i = 0; i < 5; i = i + 1) { s = s + i; if (s > 3) print s; }"
+        code, _, _ = compile_program(parse(src))
+        ops = code[::2]
+        assert BINOP_NAMES in ops
+        assert COMPARE_NAME_JUMP in ops
+        assert POP not in ops
+        ctx = run_src(src, {"i": 0, "s": 0})
+        assert capsys.readouterr().out == "6\n10\n"
+        assert ctx["s"] == 10
+
+    def test_superinstruções_com_nomes_em_escopos_externos(self, capsys):
+        ctx = Ctx.from_dict({"i": 0}).push({})
+        code, consts, names = compile_program(parse("while (i < 3) i = i + 1; print max(i, 1);"))
+        run(code, consts, names, ctx)
+        assert capsys.readouterr().out == "3\n"
+        assert ctx["i"] == 3
+        assert ctx.scope == {}
+
+    @pytest.mark.parametrize("src, x", [("x and (y = 1);", False), ("x or (y = 1);", True)])
+    def test_atribuição_em_curto_circuito_não_deixa_valores_na_pilha(self, src, x):
+        code, consts, names = compile_program(parse(f"while (i < 5) {{ i = i + 1; {src} }}"))
+        handlers = list(thread(code, consts, names))
+        stacks = []
+
+        def halt(stack, ctx):
+            stacks.append(list(stack))
+            raise Halt
+
+        handlers[len(code)] = halt
+        ctx = Ctx.from_dict({"i": 0, "x": x, "y": 0})
+        execute(handlers, ctx)
+        assert stacks == [[]]
+        assert ctx["i"] == 5 and ctx["y"] == 0
+
+    def test_laço_for(self, capsys):
+        src = "for (i = 0; i < 3; i = i + 1) print i;"
+        ctx = run_src(src, {"i": None})
+        assert capsys.readouterr().out == "0\n1\n2\n"
+        assert ctx["i"] == 3
+
+    def test_condicional_e_operadores_lógicos(self, capsys):
+        src = """
+        if (x > 1 and !(x > 10)) print "meio"; else print "fora";
+        print nil or "default";
+        print false and undefined_var;
+        """
+        run_src(src, {"x": 5})
+        assert capsys.readouterr().out == "meio\ndefault\nfalse\n"
+
+    def test_operadores_prefixos(self, capsys):
+        run_src("print -x; print !x; print !nil;", {"x": 5})
+        assert capsys.readouterr().out == "-5\nfalse\ntrue\n"
+
+    def test_chamada_de_função(self, capsys):
+        run_src("print max(x, 2) * 2;", {"x": 10})
+        assert capsys.readouterr().out == "20\n"
+
+    def test_variável_inexistente(self):
+        with pytest.raises(NameError):
+            run_src("print y;", {})
+
+    def test_chamadas_com_diferentes_aridades(self, capsys):
+        env = {"zero": lambda: 0, "um": lambda x: x, "tres": lambda x, y, z: x + y + z}
+        run_src("print zero(); print um(1); print max(1, 2); print tres(1, 2, 3);", env)
+        assert capsys.readouterr().out == "0\n1\n2\n6\n"
+
+    def test_chamada_de_valor_que_não_é_função(self):
+        with pytest.raises(TypeError):
+            run_src("x(1, 2);", {"x": 1})
+
+    def test_programa_usa_a_vm(self, capsys):
+        ast = parse("n = n + 1.5; print n;")
+        ctx = Ctx.from_dict({"n": 1})
+        ast.eval(ctx)
+        ast.eval(ctx)
+        assert capsys.readouterr().out == "2\n3\n"
+
+    def test_variáveis_locais_usam_slots(self, capsys):
+        src = "x = 1; { var x; x = 2; x = x + 1; print x; } print x;"
+        ast = parse(src)
+        ctx = Ctx.from_dict({"x": 0})
+        ast.eval(ctx)
+        assert capsys.readouterr().out == "3\n1\n"
+        code, _, _ = ast._bytecode
+        assert LOAD_SLOT in code[::2]
+        assert ctx["x"] == 1
+        assert type(ast.stmts[1].declarations[0]) is VarDef
+
+    def test_variável_capturada_por_função_usa_nome(self, capsys):
+        src = "{ var y; y = 1; fun f() { print y; } f(); }"
+        code, _, _ = compile_program(parse(src))
+        assert EXEC in code[::2]
+        assert LOAD_SLOT not in code[::2]
+        ctx = run_src(src, {})
+        assert capsys.readouterr().out == "1\n"
+        assert "y" not in ctx and "f" not in ctx
+
+    def test_superinstruções(self, capsys):
+        src = "{ var k; var x; k = 0; x = 0.5; while (k < 5) { x = x + k; k = k + 1; x = x + 1.0; } print k; print x; }"
+        code, _, _ = compile_program(parse(src))
+        assert ADD_CONST_SLOT in code[::2]
+        assert BINOP_SLOTS in code[::2]
+        run_src(src, {})
+        assert capsys.readouterr().out == "5\n15.5\n"
+
+    def test_laço_while_cmp_usa_comparação_com_salto(self, capsys):
+        src = "{ var k; k = 0; while (k < 3) { print k; k = k + 1; } }"
+        code, _, _ = compile_program(parse(src))
+        assert COMPARE_SLOT_JUMP in code[::2]
+        assert JUMP_IF_FALSE not in code[::2]
+        run_src(src, {})
+        assert capsys.readouterr().out == "0\n1\n2\n"
+
+
+class TestJit:
+    @pytest.fixture(autouse=True)
+    def hot_loops(self, monkeypatch):
+        pytest.importorskip("numba")
+        monkeypatch.setattr(jit, "ENABLED", True)
+        monkeypatch.setattr(jit, "HOT_LOOP_THRESHOLD", 10)
+
+    def test_laço_numérico_é_compilado(self):
+        src = "for (i = 0; i < 100; i = i + 1) { if (i > 50) x = x + 0.5; else x = x - 1; }"
+        ast = parse(src)
+        ctx = Ctx.from_dict({"i": 0, "x": 0.0})
+        ast.eval(ctx)
+        assert ctx["i"] == 100
+        assert ctx["x"] == 49 * 0.5 - 51
+        [loop] = [c for c in ast._bytecode[1] if isinstance(c, jit.HotLoop)]
+        assert any(loop.cache.values())
+
+    def test_laços_idênticos_compartilham_a_versão_compilada(self):
+        src = "while (i < 100) i = i + 1;"
+        loops = []
+        for _ in range(2):
+            ast = parse(src)
+            ast.eval(Ctx.from_dict({"i": 0}))
+            loops.extend(c for c in ast._bytecode[1] if isinstance(c, jit.HotLoop))
+        [fn1], [fn2] = (list(loop.cache.values()) for loop in loops)
+        assert fn1 is fn2 is not None
+
+    def test_divisão_inteira(self):
+        ctx = run_src("while (n > 1) { n = n / 2; k = k + 1; }", {"n": 2**40, "k": 0})
+        assert ctx["n"] == 1
+        assert ctx["k"] == 40
+
+    def test_laço_com_mudança_de_tipo_não_é_compilado(self):
+        ctx = run_src("while (i < 100) { i = i + 1; y = y + 0.5; }", {"i": 0, "y": 0})
+        assert ctx["i"] == 100
+        assert ctx["y"] == 50.0
+
+    def test_laço_com_variável_local(self):
+        src = "{ var k; k = 0; while (k < 100) { k = k + 1; n = n + k; } print k; }"
+        ctx = run_src(src, {"n": 0})
+        assert ctx["n"] == 5050
+
+    def test_laço_com_print_usa_o_interpretador(self):
+        assert not jit.supports(parse("while (i < 3) { print i; i = i + 1; }").stmts[0])
+
+    def test_estouro_de_inteiro_volta_para_a_vm(self):
+        src = "while (c < 70) { p = p * 2; c = c + 1; }"
+        ctx = run_src(src, {"c": 0, "p": 1})
+        assert ctx["c"] == 70
+        assert ctx["p"] == 2**70
+
+    def test_divisão_por_zero_no_laço_compilado(self):
+        with pytest.raises(ZeroDivisionError):
+            run_src("while (c < 20) { c = c + 1; if (c > 15) p = p / 0; }", {"c": 0, "p": 1})